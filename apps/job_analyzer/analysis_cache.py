@@ -0,0 +1,61 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+CACHE_ROOT = os.getenv("JOB_ANALYZER_CACHE_DIR") or os.path.join(os.path.dirname(__file__), 'cache')
+CACHE_DIR = os.path.join(CACHE_ROOT, 'analysis')
+
+
+def normalize_text(text):
+    """Normalizes whitespace so cosmetic differences do not defeat the cache."""
+    lines = [line.strip() for line in text.strip().splitlines()]
+    return '\n'.join(line for line in lines if line)
+
+
+def make_key(job_text, requirements, model_name, prompt_version):
+    """Builds the cache key from everything that influences the analysis result."""
+    digest = hashlib.sha256()
+    for part in (model_name, prompt_version, normalize_text(requirements), normalize_text(job_text)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """Persistent store of LLM analysis results, one JSON file per key."""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Returns the cached analysis for the key, or None."""
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f).get("analysis")
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def set(self, key, analysis):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"created_at": time.time(), "analysis": analysis}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_analysis_cache():
+    """Returns the process-wide analysis cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisCache()
+        return _cache
@@ -0,0 +1,143 @@
+import json
+
+RANKS = ("S", "A", "B", "C")
+
+# Gemini response_schema (OpenAPI subset) for a single job analysis
+RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "rank": {"type": "string", "enum": list(RANKS), "description": "総合判定 (Sが最高、Cが最低)"},
+        "score": {"type": "integer", "description": "適合スコア (0-100)"},
+        "reasons": {"type": "array", "items": {"type": "string"}, "description": "推奨理由"},
+        "concerns": {"type": "array", "items": {"type": "string"}, "description": "懸念点"},
+        "criteria": {
+            "type": "array",
+            "description": "各希望条件に対する適合度",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "description": "希望条件の項目名"},
+                    "match": {"type": "string", "enum": ["適合", "一部適合", "不適合", "不明"]},
+                    "comment": {"type": "string", "description": "判断の根拠"}
+                },
+                "required": ["name", "match", "comment"]
+            }
+        }
+    },
+    "required": ["rank", "score", "reasons", "concerns", "criteria"]
+}
+
+# Several jobs analyzed in one request; each result echoes the job_id it belongs to
+BATCH_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": dict(RESPONSE_SCHEMA["properties"], job_id={"type": "string"}),
+                "required": ["job_id"] + RESPONSE_SCHEMA["required"]
+            }
+        }
+    },
+    "required": ["results"]
+}
+
+# One job scored against several requirement profiles; each result echoes its profile_id
+PROFILE_BATCH_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": dict(RESPONSE_SCHEMA["properties"], profile_id={"type": "string"}),
+                "required": ["profile_id"] + RESPONSE_SCHEMA["required"]
+            }
+        }
+    },
+    "required": ["results"]
+}
+
+
+def _string_list(value, field):
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"'{field}' must be a list of strings")
+    return [item.strip() for item in value if item.strip()]
+
+
+def validate_analysis(data):
+    """Validates and normalizes a decoded analysis dict; raises ValueError if malformed."""
+    if not isinstance(data, dict):
+        raise ValueError("Analysis must be a JSON object")
+
+    rank = str(data.get("rank", "")).strip().upper()
+    if rank not in RANKS:
+        raise ValueError(f"Invalid rank: {data.get('rank')!r}")
+
+    try:
+        score = int(data.get("score"))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid score: {data.get('score')!r}")
+
+    criteria = []
+    for item in data.get("criteria", []):
+        if not isinstance(item, dict) or not item.get("name"):
+            raise ValueError("Each criterion needs a name")
+        criteria.append({
+            "name": str(item["name"]),
+            "match": str(item.get("match", "不明")),
+            "comment": str(item.get("comment", ""))
+        })
+
+    return {
+        "rank": rank,
+        "score": max(0, min(100, score)),
+        "reasons": _string_list(data.get("reasons", []), "reasons"),
+        "concerns": _string_list(data.get("concerns", []), "concerns"),
+        "criteria": criteria
+    }
+
+
+def parse_analysis(text):
+    """Decodes the model's JSON response into a validated analysis dict."""
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise ValueError(f"Response is not valid JSON: {e}")
+    return validate_analysis(data)
+
+
+def parse_batch_analysis(text, id_field="job_id"):
+    """Decodes a batched response into {id: analysis} keyed by id_field, skipping malformed entries."""
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise ValueError(f"Response is not valid JSON: {e}")
+    if not isinstance(data, dict) or not isinstance(data.get("results"), list):
+        raise ValueError("Batch response must contain a 'results' list")
+
+    analyses = {}
+    for item in data["results"]:
+        try:
+            analyses[str(item[id_field])] = validate_analysis(item)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Skipping malformed batch entry: {e}")
+    return analyses
+
+
+def render_markdown(analysis):
+    """Renders a structured analysis as the Markdown report shown in the UI."""
+    lines = [
+        f"# 総合判定: {analysis['rank']}",
+        f"適合スコア: {analysis['score']}",
+        "",
+        "## 推奨理由",
+    ]
+    lines.extend(f"- {reason}" for reason in analysis["reasons"] or ["(なし)"])
+    lines.extend(["", "## 懸念点"])
+    lines.extend(f"- {concern}" for concern in analysis["concerns"] or ["(なし)"])
+    lines.extend(["", "## 詳細分析"])
+    for criterion in analysis["criteria"]:
+        lines.append(f"- **{criterion['name']}**: {criterion['match']} — {criterion['comment']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,122 @@
+import os
+import re
+import hashlib
+import threading
+import google.generativeai as genai
+
+MODEL_NAME = 'gemini-2.0-flash'
+REQUIREMENTS_PATH = os.path.join(os.path.dirname(__file__), 'requirements.md')
+# Extra named requirement profiles live in profiles/<name>.md; "default" is requirements.md
+PROFILES_DIR = os.path.join(os.path.dirname(__file__), 'profiles')
+DEFAULT_PROFILE = "default"
+PROFILE_NAME_PATTERN = re.compile(r"^[\w\-]{1,40}$", re.ASCII)
+
+
+class AnalyzerService:
+    """Process-wide holder of the configured Gemini model and the requirements text.
+
+    The model (and the HTTP client behind it) is built once and reused for every
+    analysis. requirements.md and the named profiles are kept in memory and
+    only re-read when their mtime changes on disk.
+    """
+
+    def __init__(self, requirements_path=REQUIREMENTS_PATH, model_name=MODEL_NAME, profiles_dir=PROFILES_DIR):
+        self.requirements_path = requirements_path
+        self.profiles_dir = profiles_dir
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._model = None
+        self._files = {}  # path -> (mtime_ns, content)
+
+    def get_model(self):
+        """Returns the shared GenerativeModel, configuring the client on first use."""
+        with self._lock:
+            if self._model is None:
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise RuntimeError("GEMINI_API_KEY not found.")
+                genai.configure(api_key=api_key)
+                self._model = genai.GenerativeModel(self.model_name)
+            return self._model
+
+    def _read(self, path):
+        """Returns a file's content, re-reading it only when it changed; None if missing."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            cached = self._files.get(path)
+            if cached is None or cached[0] != mtime:
+                with open(path, 'r', encoding='utf-8') as f:
+                    cached = (mtime, f.read())
+                self._files[path] = cached
+            return cached[1]
+
+    def _write(self, path, content):
+        with self._lock:
+            try:
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                self._files[path] = (os.stat(path).st_mtime_ns, content)
+                return True
+            except Exception as e:
+                print(f"Error saving file: {e}")
+                return False
+
+    def _profile_path(self, name):
+        if name == DEFAULT_PROFILE:
+            return self.requirements_path
+        if not PROFILE_NAME_PATTERN.match(name or ""):
+            raise ValueError(f"Invalid profile name: {name!r}")
+        return os.path.join(self.profiles_dir, f"{name}.md")
+
+    def get_requirements(self, profile=DEFAULT_PROFILE):
+        """Returns requirements.md (or a named profile), re-reading it only when the file changed."""
+        path = self._profile_path(profile)
+        content = self._read(path)
+        if content is None:
+            print(f"Error: File not found: {path}")
+            return ""
+        return content
+
+    def get_requirements_version(self, profile=DEFAULT_PROFILE):
+        """Short content hash of a profile's requirements; results record it to detect staleness."""
+        return hashlib.sha256(self.get_requirements(profile).encode('utf-8')).hexdigest()[:12]
+
+    def save_requirements(self, content, profile=DEFAULT_PROFILE):
+        """Writes requirements.md (or a named profile) and updates the in-memory copy; returns True on success."""
+        path = self._profile_path(profile)
+        if profile != DEFAULT_PROFILE:
+            os.makedirs(self.profiles_dir, exist_ok=True)
+        return self._write(path, content)
+
+    def list_profiles(self):
+        """Names of all requirement profiles, "default" first."""
+        names = []
+        if os.path.isdir(self.profiles_dir):
+            names = sorted(
+                name[:-len('.md')] for name in os.listdir(self.profiles_dir)
+                if name.endswith('.md') and PROFILE_NAME_PATTERN.match(name[:-len('.md')])
+                and name[:-len('.md')] != DEFAULT_PROFILE
+            )
+        return [DEFAULT_PROFILE] + names
+
+    def has_profile(self, name):
+        try:
+            return os.path.exists(self._profile_path(name))
+        except ValueError:
+            return False
+
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_analyzer_service():
+    """Returns the process-wide analyzer service, creating it on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = AnalyzerService()
+        return _service
@@ -1,78 +1,335 @@
 import os
+import sys
 import json
 import uuid
+import threading
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
-from flask import Flask, render_template, request, jsonify, abort
-from job_logic import fetch_text_from_url, analyze_job_content, load_file, generate_html_report_content
+from functools import lru_cache
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, Response, render_template, request, jsonify, abort, stream_with_context
+from job_logic import (
+    fetch_text_from_url, analyze_job_content, analyze_jobs_batch, analyze_job_profiles, generate_html_report_content,
+    is_analysis_cached
+)
+from analysis_schema import render_markdown
+from analyzer_service import get_analyzer_service, DEFAULT_PROFILE
+from history_index import HistoryIndex
+from dedup_index import DedupIndex
+from prefilter import get_prefilter, key_facts
+from result_store import ResultStore
+from rescorer import Rescorer
+from prerank import ngram_counts, rank_counts, top_k_order
+from job_queue import JobQueue
+from metrics import metrics, span, start_trace, finish_trace, current_trace, track_inflight, record_error
 
 app = Flask(__name__)
 
 # Config
-LOGS_DIR = os.path.join(os.path.dirname(__file__), 'logs')
-REQUIREMENTS_PATH = os.path.join(os.path.dirname(__file__), 'requirements.md')
+# Results, history and queue databases; JOB_ANALYZER_DATA_DIR moves them elsewhere
+LOGS_DIR = os.getenv("JOB_ANALYZER_DATA_DIR") or os.path.join(os.path.dirname(__file__), 'logs')
+HISTORY_DB_PATH = os.path.join(LOGS_DIR, 'history.db')
+JOBS_DB_PATH = os.path.join(LOGS_DIR, 'jobs.db')
+FINGERPRINTS_DB_PATH = os.path.join(LOGS_DIR, 'fingerprints.db')
+RESULTS_DIR = os.path.join(LOGS_DIR, 'results')
 os.makedirs(LOGS_DIR, exist_ok=True)
 
-# Helper to load requirements once or reload on request (here reloading to keep it fresh)
+history_index = HistoryIndex(HISTORY_DB_PATH)
+history_index.migrate_from_logs(LOGS_DIR)
+
+# Full results live in compressed append-only segments; legacy <id>.json logs are moved in once
+result_store = ResultStore(
+    RESULTS_DIR,
+    max_segment_bytes=int(float(os.getenv("RESULT_SEGMENT_MAX_MB", "16")) * 1024 * 1024),
+    compact_ratio=float(os.getenv("RESULT_COMPACT_RATIO", "0.5"))
+)
+result_store.migrate_from_json(LOGS_DIR)
+
+def search_entry(result):
+    """(id, url, rank, job_text, markdown) of a stored result for the search index."""
+    markdown = render_markdown(result["analysis"]) if "analysis" in result else result.get("markdown", "")
+    return (result["id"], result.get("url"), result.get("rank"), result.get("job_text"), markdown)
+
+history_index.backfill_search(search_entry(result) for result in result_store.iter_records())
+
+# Near-duplicate detection of reposted jobs (SimHash Hamming distance)
+dedup_index = DedupIndex(FINGERPRINTS_DB_PATH, max_distance=int(os.getenv("DEDUP_MAX_DISTANCE", "3")))
+if dedup_index.needs_rebuild:
+    # Fingerprints from an older simhash() were dropped; recompute them from the stored job texts
+    dedup_index.add_many(
+        (record["id"], record["job_text"]) for record in result_store.iter_records()
+        if record.get("status") == "success" and record.get("job_text")
+        and record.get("profile", DEFAULT_PROFILE) == DEFAULT_PROFILE
+    )
+
+# Shared worker pool for URL analysis; page rendering itself is delegated to the
+# warm browsers in browser_pool, so each URL only pays for a page open/close.
+url_executor = ThreadPoolExecutor(max_workers=int(os.getenv("ANALYZE_WORKERS", "5")))
+
+# Requirements are cached in memory by the analyzer service and re-read only when
+# requirements.md changes on disk
 def get_requirements():
-    return load_file(REQUIREMENTS_PATH)
+    return get_analyzer_service().get_requirements()
 
-def format_analysis_result(url_or_text, analysis_markdown):
-    """Common formatter for analysis results."""
-    from job_logic import generate_html_report_content
-    analysis_html = generate_html_report_content(analysis_markdown)
-    
-    # Parse basic result (Rank and Score) from markdown
-    rank = "Unknown"
-    score = 0
-    import re
-    
-    rank_match = re.search(r"総合判定:\s?([\*]*)([SABC])", analysis_markdown)
-    if rank_match:
-        rank = rank_match.group(2)
-    
-    score_match = re.search(r"適合スコア:\s?(\d+)", analysis_markdown)
-    if score_match:
-        try:
-            score = int(score_match.group(1))
-        except:
-            pass
+@lru_cache(maxsize=int(os.getenv("HTML_RENDER_CACHE_SIZE", "256")))
+def render_report_html(markdown_content):
+    """Markdown -> HTML for /log/<id>, memoized so reopening a report does not re-render it."""
+    return generate_html_report_content(markdown_content)
+
+def find_previous_analysis(url_or_text, job_text):
+    """Returns a result linking to the analysis of a near-identical job, or None.
 
+    Jobs the pre-filter rejects or whose analysis is already cached go the
+    normal way, and a match is only reused when it was scored against the
+    current requirements and its salary, location and remote policy are the
+    same as in the job it was made for.
+    """
+    requirements = get_requirements()
+    if get_prefilter().rejects(job_text, requirements) or is_analysis_cached(job_text, requirements):
+        return None
+    version = get_analyzer_service().get_requirements_version()
+    with span('dedup_lookup'):
+        matches = dedup_index.matches(job_text)
+    for log_id, distance in matches:
+        prior = history_index.get(log_id)
+        if prior is None or prior["requirements_version"] != version:
+            continue  # Stale results wait for the re-scorer instead of being handed out
+        record = result_store.get(log_id)
+        if not record or not record.get("job_text") or key_facts(record["job_text"]) != key_facts(job_text):
+            continue
+        metrics.inc("job_analyzer_duplicates_total")
+        return dict(
+            prior,
+            url=url_or_text[:100] + ("..." if len(url_or_text) > 100 else ""),
+            duplicate_of=log_id,
+            duplicate_url=prior["url"],
+            distance=distance
+        )
+    return None
+
+def format_analysis_result(url_or_text, analysis, job_text=None, profile=DEFAULT_PROFILE):
+    """Common formatter for analysis results.
+
+    Only the structured analysis (and the job text it was based on) is stored;
+    Markdown/HTML are rendered on demand by /log/<id>.
+    """
     result_data = {
         "id": str(uuid.uuid4()),
         "url": url_or_text[:100] + ("..." if len(url_or_text) > 100 else ""),
         "timestamp": datetime.now().isoformat(),
-        "rank": rank,
-        "score": score,
-        "markdown": analysis_markdown,
-        "html": analysis_html,
-        "status": "success"
+        "rank": analysis["rank"],
+        "score": analysis["score"],
+        "analysis": analysis,
+        "status": "success",
+        "profile": profile,
+        "requirements_version": get_analyzer_service().get_requirements_version(profile),
+        # Per-stage latency (ms) of this request, up to this point
+        "timings": dict(current_trace() or {})
     }
     
     # Save Log
-    log_path = os.path.join(LOGS_DIR, f"{result_data['id']}.json")
-    with open(log_path, 'w', encoding='utf-8') as f:
-        json.dump(result_data, f, ensure_ascii=False, indent=2)
+    with span('write_log'):
+        save_result(result_data, job_text)
+        # Duplicates are answered with the default profile's result only
+        if job_text and profile == DEFAULT_PROFILE:
+            dedup_index.add(result_data["id"], job_text)
         
     return result_data
 
-def process_single_url(url):
-    """Processes a single URL: fetch -> analyze -> return result dict."""
+def save_result(result_data, job_text=None):
+    """Writes a result to the store and updates the history and search indexes."""
+    result_store.append(dict(result_data, job_text=job_text))
+    history_index.add(result_data)
+    history_index.index_text(*search_entry(dict(result_data, job_text=job_text)))
+
+def format_profiles_result(url_or_text, analyses, job_text):
+    """Stores one result per profile and combines them; the best-scoring profile's summary is on top."""
+    results = []
+    for profile, analysis in analyses.items():
+        if "error" in analysis:
+            results.append({"profile": profile, "status": "error", "message": analysis["error"]})
+        else:
+            results.append(format_analysis_result(url_or_text, analysis, job_text, profile))
+    succeeded = [result for result in results if result["status"] == "success"]
+    if not succeeded:
+        return {"url": url_or_text, "status": "error", "message": results[0]["message"], "profiles": results}
+    best = max(succeeded, key=lambda result: result["score"])
+    return {
+        "url": best["url"],
+        "status": "success",
+        "id": best["id"],
+        "rank": best["rank"],
+        "score": best["score"],
+        "profile": best["profile"],
+        "profiles": results
+    }
+
+def analyze_profiles(url_or_text, job_text, profiles, force_refresh=False):
+    """Scores one fetched job against several profiles (see analyze_job_profiles)."""
+    service = get_analyzer_service()
+    with span('analyze'):
+        analyses = analyze_job_profiles(
+            job_text, {profile: service.get_requirements(profile) for profile in profiles}, force_refresh=force_refresh
+        )
+    return format_profiles_result(url_or_text, analyses, job_text)
+
+def parse_profiles(data):
+    """Returns (profile names or None, error message) from a request body's optional "profiles" list."""
+    profiles = data.get('profiles')
+    if not profiles:
+        return None, None
+    if not isinstance(profiles, list) or not all(isinstance(name, str) for name in profiles):
+        return None, "'profiles' must be a list of profile names"
+    service = get_analyzer_service()
+    unknown = [name for name in profiles if not service.has_profile(name)]
+    if unknown:
+        return None, f"Unknown profile(s): {', '.join(unknown)}"
+    return list(dict.fromkeys(profiles)), None
+
+# Re-scores stale results in the background when requirements change
+rescorer = Rescorer(history_index, result_store, save_result, workers=int(os.getenv("RESCORE_WORKERS", "2")))
+
+def process_single_url(url, force_refresh=False, profiles=None):
+    """Processes a single URL: fetch -> analyze (once per profile when given) -> return result dict."""
+    start_trace()
+    try:
+        with track_inflight(), span('total'):
+            result = _process_single_url(url, force_refresh, profiles)
+    finally:
+        finish_trace()
+    if result.get("status") == "error":
+        record_error(urlsplit(url).netloc)
+    return result
+
+def _process_single_url(url, force_refresh, profiles=None):
     try:
         if not url.startswith('http'):
             return {"url": url, "status": "error", "message": "Invalid URL"}
         
-        job_text = fetch_text_from_url(url)
+        with span('fetch'):
+            job_text = fetch_text_from_url(url, force_refresh=force_refresh)
         if job_text.startswith("Error"):
              return {"url": url, "status": "error", "message": job_text}
+
+        if profiles:
+            return analyze_profiles(url, job_text, profiles, force_refresh)
+
+        if not force_refresh:
+            previous = find_previous_analysis(url, job_text)
+            if previous:
+                return previous
         
         requirements = get_requirements()
-        analysis_markdown = analyze_job_content(job_text, requirements)
-        return format_analysis_result(url, analysis_markdown)
+        with span('analyze'):
+            analysis = analyze_job_content(job_text, requirements, force_refresh=force_refresh)
+        if "error" in analysis:
+            return {"url": url, "status": "error", "message": analysis["error"]}
+        return format_analysis_result(url, analysis, job_text)
 
     except Exception as e:
         return {"url": url, "status": "error", "message": str(e)}
 
+def process_url_batch(urls, force_refresh=False, profiles=None):
+    """Fetches several URLs, then analyzes them together with batched LLM requests.
+
+    With several profiles, each job's profiles share a request instead.
+    """
+    if profiles:
+        return list(url_executor.map(lambda url: process_single_url(url, force_refresh, profiles), urls))
+
+    start_trace()
+    try:
+        with track_inflight(), span('total'):
+            results = [None] * len(urls)
+            jobs = []
+
+            def fetch(url):
+                if not url.startswith('http'):
+                    return "Error: Invalid URL"
+                return fetch_text_from_url(url, force_refresh=force_refresh)
+
+            with span('fetch'):
+                job_texts = list(url_executor.map(fetch, urls))
+            for index, (url, job_text) in enumerate(zip(urls, job_texts)):
+                if job_text == "Error: Invalid URL":
+                    results[index] = {"url": url, "status": "error", "message": "Invalid URL"}
+                elif job_text.startswith("Error"):
+                    results[index] = {"url": url, "status": "error", "message": job_text}
+                else:
+                    previous = None if force_refresh else find_previous_analysis(url, job_text)
+                    if previous:
+                        results[index] = previous
+                    else:
+                        jobs.append((index, job_text))
+
+            if jobs:
+                with span('analyze'):
+                    analyses = analyze_jobs_batch([text for _, text in jobs], get_requirements(), force_refresh=force_refresh)
+                for (index, job_text), analysis in zip(jobs, analyses):
+                    if "error" in analysis:
+                        results[index] = {"url": urls[index], "status": "error", "message": analysis["error"]}
+                    else:
+                        results[index] = format_analysis_result(urls[index], analysis, job_text)
+    finally:
+        finish_trace()
+
+    for url, result in zip(urls, results):
+        if result.get("status") == "error":
+            record_error(urlsplit(url).netloc)
+    return results
+
+# Bulk analysis queue; only fetch failures are worth retrying, not invalid input.
+# Items of one job are claimed in groups so their analyses share LLM requests.
+job_queue = JobQueue(
+    JOBS_DB_PATH,
+    handler=process_single_url,
+    batch_handler=process_url_batch,
+    batch_size=int(os.getenv("JOB_QUEUE_BATCH_SIZE", "5")),
+    workers=int(os.getenv("JOB_QUEUE_WORKERS", "2")),
+    max_attempts=int(os.getenv("JOB_QUEUE_MAX_ATTEMPTS", "4")),
+    base_delay=int(os.getenv("JOB_QUEUE_RETRY_DELAY", "30")),
+    is_retryable=lambda result: result.get("message") != "Invalid URL"
+)
+
+# Large bulk jobs are ordered by local similarity to the requirements before any LLM call
+PRERANK_MIN_URLS = int(os.getenv("PRERANK_MIN_URLS", "20"))
+PRERANK_TOP_K = int(os.getenv("PRERANK_TOP_K", "0"))
+# Pre-ranking fetches on its own small pool so /analyze and /analyze-stream never queue behind it
+prerank_executor = ThreadPoolExecutor(max_workers=max(1, int(os.getenv("PRERANK_FETCH_WORKERS", "2"))))
+
+def prerank_job(job_id, profiles=None, top_k=0):
+    """Orders a held bulk job by TF-IDF similarity to the requirements, then releases it to the workers.
+
+    Pages are fetched up front (and land in the page cache the analysis then
+    reads). Only the top_k most similar URLs are analyzed when top_k > 0; URLs
+    whose page could not be fetched go last and are never trimmed.
+    """
+    try:
+        items = job_queue.held_items(job_id)
+        service = get_analyzer_service()
+        requirements_list = [service.get_requirements(profile) for profile in profiles or [DEFAULT_PROFILE]]
+
+        def vectorize(url):
+            if not url.startswith('http'):
+                return None
+            text = fetch_text_from_url(url)
+            return None if text.startswith("Error") else ngram_counts(text)
+
+        with span('prerank'):
+            vectors = list(prerank_executor.map(vectorize, [url for _, url in items]))
+            ranked = [(item_id, vector) for (item_id, _), vector in zip(items, vectors) if vector is not None]
+            scores = rank_counts([vector for _, vector in ranked], requirements_list)
+        priorities = {item_id: -1.0 for item_id, _ in items}
+        priorities.update((item_id, float(score)) for (item_id, _), score in zip(ranked, scores))
+        kept = {ranked[index][0] for index in top_k_order(scores, top_k)}
+        skipped = [item_id for item_id, _ in ranked if item_id not in kept]
+        job_queue.release(job_id, priorities, skipped)
+        metrics.inc("job_analyzer_prerank_skipped_total", len(skipped))
+        print(f"Pre-ranked job {job_id}: {len(ranked)} of {len(items)} page(s) scored, {len(skipped)} skipped.")
+    except Exception as e:
+        print(f"Pre-ranking failed, analyzing job {job_id} in submission order: {e}")
+        job_queue.release(job_id)
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -81,96 +338,276 @@ def index():
 def analyze():
     data = request.json
     urls = data.get('urls', [])
+    force_refresh = bool(data.get('force_refresh', False))
     
     if not urls or not isinstance(urls, list):
         return jsonify({"error": "Invalid input. 'urls' list required."}), 400
     
+    profiles, error = parse_profiles(data)
+    if error:
+        return jsonify({"error": error}), 400
+
     urls = urls[:5] 
-    results = []
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = [executor.submit(process_single_url, url) for url in urls]
-        for future in futures:
-            results.append(future.result())
+    futures = [url_executor.submit(process_single_url, url, force_refresh, profiles) for url in urls]
+    results = [future.result() for future in futures]
             
     return jsonify({"results": results})
 
+@app.route('/analyze-stream', methods=['POST'])
+def analyze_stream():
+    """Same as /analyze, but streams each result as a Server-Sent Event as soon as it completes."""
+    data = request.json
+    urls = data.get('urls', [])
+    force_refresh = bool(data.get('force_refresh', False))
+    
+    if not urls or not isinstance(urls, list):
+        return jsonify({"error": "Invalid input. 'urls' list required."}), 400
+    
+    profiles, error = parse_profiles(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    urls = urls[:5]
+    futures = [url_executor.submit(process_single_url, url, force_refresh, profiles) for url in urls]
+
+    def generate():
+        for future in as_completed(futures):
+            yield f"data: {json.dumps(future.result(), ensure_ascii=False)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route('/jobs', methods=['GET', 'POST'])
+def jobs():
+    """Submits a bulk analysis job (POST) or lists recent jobs (GET)."""
+    if request.method == 'GET':
+        return jsonify({"jobs": job_queue.list_jobs()})
+
+    data = request.json
+    urls = data.get('urls', [])
+    force_refresh = bool(data.get('force_refresh', False))
+
+    if not urls or not isinstance(urls, list):
+        return jsonify({"error": "Invalid input. 'urls' list required."}), 400
+
+    profiles, error = parse_profiles(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        top_k = int(data.get('top_k', PRERANK_TOP_K) or 0)
+    except (TypeError, ValueError):
+        return jsonify({"error": "'top_k' must be an integer"}), 400
+
+    urls = [url.strip() for url in urls if isinstance(url, str) and url.strip()]
+    options = {"force_refresh": force_refresh}
+    if profiles:
+        options["profiles"] = profiles
+    prerank = data.get('prerank')
+    if prerank is None:
+        prerank = top_k > 0 or len(urls) >= PRERANK_MIN_URLS
+    job_queue.start()
+    job_id = job_queue.submit(urls, options, hold=bool(prerank))
+    if prerank:
+        threading.Thread(target=prerank_job, args=(job_id, profiles, top_k), daemon=True).start()
+    return jsonify({"id": job_id, "total": len(urls), "prerank": bool(prerank)}), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Returns progress and per-URL status of a bulk analysis job."""
+    status = job_queue.status(job_id, include_items=request.args.get('items', '1') != '0')
+    if status is None:
+        return abort(404)
+    return jsonify(status)
+
 @app.route('/analyze-text', methods=['POST'])
 def analyze_text():
     """Analyzes raw job description text."""
     data = request.json
     text = data.get('text', '')
+    force_refresh = bool(data.get('force_refresh', False))
     
     if not text:
         return jsonify({"error": "Text is required"}), 400
+    profiles, error = parse_profiles(data)
+    if error:
+        return jsonify({"error": error}), 400
         
+    start_trace()
     try:
-        requirements = get_requirements()
-        analysis_markdown = analyze_job_content(text, requirements)
-        result = format_analysis_result("Direct Text Input", analysis_markdown)
+        with track_inflight(), span('total'):
+            if profiles:
+                result = analyze_profiles("Direct Text Input", text, profiles, force_refresh)
+                if result["status"] == "error":
+                    record_error("text-input")
+                    return jsonify(result), 502
+                return jsonify(result)
+            previous = None if force_refresh else find_previous_analysis("Direct Text Input", text)
+            if previous:
+                return jsonify(previous)
+            requirements = get_requirements()
+            with span('analyze'):
+                analysis = analyze_job_content(text, requirements, force_refresh=force_refresh)
+            if "error" in analysis:
+                record_error("text-input")
+                return jsonify({"url": "Direct Text Input", "status": "error", "message": analysis["error"]}), 502
+            result = format_analysis_result("Direct Text Input", analysis, text)
         return jsonify(result)
     except Exception as e:
+        record_error("text-input")
         return jsonify({"error": str(e)}), 500
+    finally:
+        finish_trace()
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Exposes stage latencies, cache/error counters and in-flight analyses for Prometheus."""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/requirements', methods=['GET', 'POST'])
 def handle_requirements():
     """Handles fetching and updating requirements.md."""
-    from job_logic import save_file
     if request.method == 'POST':
         data = request.json
         content = data.get('content', '')
-        if save_file(REQUIREMENTS_PATH, content):
-            return jsonify({"status": "success"})
+        if get_analyzer_service().save_requirements(content):
+            if os.getenv("RESCORE_ON_SAVE", "1") != "0":
+                rescorer.start()
+            return jsonify({"status": "success", "rescore": rescorer.progress()})
         else:
             return jsonify({"status": "error", "message": "Failed to save requirements"}), 500
     else:
         content = get_requirements()
         return jsonify({"content": content})
 
+@app.route('/profiles', methods=['GET'])
+def list_profiles():
+    """Lists the requirement profiles ("default" is requirements.md)."""
+    service = get_analyzer_service()
+    return jsonify({"profiles": [
+        {"name": name, "requirements_version": service.get_requirements_version(name)} for name in service.list_profiles()
+    ]})
+
+@app.route('/profiles/<name>', methods=['GET', 'POST'])
+def handle_profile(name):
+    """Fetches or creates/updates one named requirement profile."""
+    service = get_analyzer_service()
+    try:
+        if request.method == 'POST':
+            content = (request.json or {}).get('content', '')
+            if not service.save_requirements(content, profile=name):
+                return jsonify({"status": "error", "message": "Failed to save profile"}), 500
+            if os.getenv("RESCORE_ON_SAVE", "1") != "0":
+                rescorer.start()
+            return jsonify({"status": "success", "rescore": rescorer.progress()})
+        if not service.has_profile(name):
+            return abort(404)
+        return jsonify({"name": name, "content": service.get_requirements(name)})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
 @app.route('/history', methods=['GET'])
 def history():
-    """Returns list of past logs (summary only)."""
-    logs = []
+    """Returns a page of past logs (summary only) from the history index."""
     try:
-        files = sorted(os.listdir(LOGS_DIR), reverse=True)
-        files.sort(key=lambda x: os.path.getmtime(os.path.join(LOGS_DIR, x)), reverse=True)
-        
-        for filename in files:
-            if filename.endswith('.json'):
-                try:
-                    with open(os.path.join(LOGS_DIR, filename), 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        logs.append({
-                            "id": data.get("id"),
-                            "url": data.get("url"),
-                            "rank": data.get("rank"),
-                            "score": data.get("score", 0),
-                            "timestamp": data.get("timestamp"),
-                            "status": data.get("status")
-                        })
-                except:
-                    continue
+        logs, total = history_index.query(
+            page=request.args.get('page', 1, type=int),
+            per_page=request.args.get('per_page', 50, type=int),
+            sort=request.args.get('sort', 'timestamp'),
+            order=request.args.get('order', 'desc'),
+            rank=request.args.get('rank'),
+            min_score=request.args.get('min_score', type=int),
+            max_score=request.args.get('max_score', type=int),
+            profile=request.args.get('profile')
+        )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-        
-    return jsonify({"logs": logs})
+
+    # Results scored against older requirements of their profile stay marked until re-scored
+    service = get_analyzer_service()
+    versions = {profile: service.get_requirements_version(profile) for profile in service.list_profiles()}
+    for log in logs:
+        log["unrecoverable"] = bool(log["unrecoverable"])
+        log["stale"] = (log["status"] == "success" and not log["unrecoverable"]
+                        and log.get("requirements_version") != versions.get(log["profile"]))
+    return jsonify({"logs": logs, "total": total})
+
+@app.route('/rescore', methods=['GET', 'POST'])
+def rescore():
+    """GET: progress of the background re-scoring. POST: re-score stale results now."""
+    if request.method == 'POST':
+        rescorer.start()
+        return jsonify(rescorer.progress()), 202
+    return jsonify(rescorer.progress())
+
+@app.route('/search', methods=['GET'])
+def search():
+    """Full-text search over job text, analysis, URL and rank (all terms must match)."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+    if not history_index.search_enabled:
+        return jsonify({"error": "Full-text search needs SQLite with FTS5 trigram support (3.34+)"}), 501
+    try:
+        with span('search'):
+            results, total = history_index.search(
+                query,
+                page=request.args.get('page', 1, type=int),
+                per_page=request.args.get('per_page', 20, type=int),
+                rank=request.args.get('rank')
+            )
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"results": results, "total": total})
 
 @app.route('/log/<log_id>', methods=['GET', 'DELETE'])
 def get_log(log_id):
     """Returns or deletes full log details."""
-    log_path = os.path.join(LOGS_DIR, f"{log_id}.json")
-    if not os.path.exists(log_path):
-        return abort(404)
-    
     if request.method == 'DELETE':
+        if log_id not in result_store:
+            return abort(404)
         try:
-            os.remove(log_path)
+            result_store.delete(log_id)
+            history_index.delete(log_id)
+            dedup_index.delete(log_id)
+            # Segments are rewritten only once enough of them is garbage, off the request thread
+            if result_store.needs_compaction():
+                threading.Thread(target=result_store.compact, daemon=True).start()
             return jsonify({"status": "success"})
         except Exception as e:
             return jsonify({"error": str(e)}), 500
     
-    with open(log_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = result_store.get(log_id)
+    if data is None:
+        return abort(404)
+    data.pop("job_text", None)
+    # Older logs carry pre-rendered markdown; newer ones only the structured analysis
+    if request.args.get('render', '1') != '0':
+        if "analysis" in data:
+            data["markdown"] = render_markdown(data["analysis"])
+        if data.get("markdown"):
+            data["html"] = render_report_html(data["markdown"])
     return jsonify(data)
 
+def is_reloader_parent():
+    """True in the debug reloader's watcher process, which imports the app but never serves it."""
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        return False
+    if __name__ == '__main__':
+        return True  # python app.py always runs with the reloader (debug=True below)
+    argv = sys.argv[1:]
+    flask_cli = os.path.basename(sys.argv[0]) == 'flask' or sys.argv[0].endswith(os.path.join('flask', '__main__.py'))
+    reload = '--reload' in argv or '--debug' in argv or os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true')
+    return flask_cli and reload and '--no-reload' not in argv
+
+# Resume unfinished bulk jobs as soon as the app is loaded, whatever server runs it.
+# Started last so queued items never reach a handler that is not defined yet.
+if not is_reloader_parent():
+    job_queue.start()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001)
@@ -0,0 +1,68 @@
+"""Checks job text compaction against expected outputs and measures it.
+
+Each bench/fixtures/compaction/<name>.txt is compacted and compared with
+<name>.expected.txt. Then the text extracted from every page in
+bench/fixtures/pages is compacted to report the size reduction and speed.
+
+Usage:
+    python bench/compaction_bench.py [--budget TOKENS] [--iterations N]
+"""
+import os
+import sys
+import time
+import glob
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from compaction import compact_job_text, estimate_tokens
+from extractors import get_extractor
+
+CASES_DIR = os.path.join(BENCH_DIR, 'fixtures', 'compaction')
+PAGES_DIR = os.path.join(BENCH_DIR, 'fixtures', 'pages')
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and benchmark job text compaction.')
+    parser.add_argument('--budget', type=int, default=8000, help='Token budget passed to compact_job_text')
+    parser.add_argument('--iterations', type=int, default=200, help='Passes over the page corpus')
+    args = parser.parse_args()
+
+    # 1. Expected outputs
+    failures = 0
+    cases = sorted(path for path in glob.glob(os.path.join(CASES_DIR, '*.txt')) if not path.endswith('.expected.txt'))
+    for path in cases:
+        expected = read_text(path[:-len('.txt')] + '.expected.txt')
+        actual = compact_job_text(read_text(path), args.budget)
+        if actual != expected:
+            failures += 1
+            print(f"  MISMATCH {os.path.basename(path)}:\n{actual}\n")
+    print(f"Cases: {len(cases) - failures}/{len(cases)} OK")
+
+    # 2. Reduction and speed on the extracted page corpus
+    extractor = get_extractor()
+    texts = []
+    for path in sorted(glob.glob(os.path.join(PAGES_DIR, '*.html'))):
+        with open(path, 'rb') as f:
+            texts.append(extractor.extract(f.read()))
+    before = sum(estimate_tokens(text) for text in texts)
+    after = sum(estimate_tokens(compact_job_text(text, args.budget)) for text in texts)
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        for text in texts:
+            compact_job_text(text, args.budget)
+    elapsed = time.perf_counter() - start
+    pages = args.iterations * len(texts)
+    print(f"Pages: {len(texts)}, tokens {before} -> {after} ({after / before:.0%}), {elapsed / pages * 1000:.3f} ms/page")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""End-to-end throughput benchmark that runs fully offline.
+
+Serves the saved pages from bench/fixtures/pages with a local fixture server
+(static, slow or JS-rendered variants), replaces Gemini with the stub LLM,
+and drives one pipeline per mode at each concurrency level:
+
+    fetch    job_logic.fetch_text_from_url (HTTP tier, browser tier for --variant js)
+    analyze  POST /analyze on a local instance of the Flask app, one URL per request
+    cli      main.py --batch over text files extracted from the fixtures
+
+The static and slow variants default to the pages long enough for the plain
+HTTP tier (shorter pages go to the browser tier, as in production; choose
+them with --pages). Every run happens in a fresh subprocess so peak RSS is
+measured per run, and gets its own temporary data and cache directories
+(JOB_ANALYZER_DATA_DIR / JOB_ANALYZER_CACHE_DIR), so nothing is written to
+the app's logs/ or cache/.
+Reports p50/p95 latency per job, jobs per minute and peak RSS.
+
+Usage:
+    python bench/e2e_bench.py [--modes fetch,analyze,cli] [--concurrency 1,4,8]
+                              [--jobs 40] [--variant static|slow|js] [--llm-latency 0.5]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import resource
+import threading
+import contextlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fixture_server import FixtureServer, FIXTURES_DIR, VARIANTS
+
+MODES = ("fetch", "analyze", "cli")
+RESULT_PREFIX = "E2E_RESULT "
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def select_pages(variant):
+    """Fixture pages for a variant: those the HTTP tier can read, or all of them for js."""
+    names = sorted(name for name in os.listdir(FIXTURES_DIR) if name.endswith('.html'))
+    if variant == 'js':
+        return names
+    from job_logic import extract_text_from_html, MIN_STATIC_TEXT_LENGTH
+    readable = []
+    for name in names:
+        with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+            if len(extract_text_from_html(f.read())) >= MIN_STATIC_TEXT_LENGTH:
+                readable.append(name)
+    return readable or names
+
+
+def job_urls(args):
+    names = args.pages.split(',')
+    delay = args.slow_delay if args.variant == 'slow' else None
+    return [
+        f"{args.base_url}/{args.variant}/{names[i % len(names)]}?n={i}" + (f"&delay={delay}" if delay is not None else "")
+        for i in range(args.jobs)
+    ]
+
+
+def timed_map(fn, items, concurrency):
+    """Runs fn over items on a pool; returns ([(ok, seconds)], wall seconds)."""
+    def one(item):
+        start = time.perf_counter()
+        try:
+            ok = fn(item)
+        except Exception as e:
+            print(f"error: {e}", file=sys.stderr)
+            ok = False
+        return ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(one, items))
+    return outcomes, time.perf_counter() - start
+
+
+def run_fetch(args):
+    from job_logic import fetch_text_from_url
+    return timed_map(lambda url: not fetch_text_from_url(url, force_refresh=True).startswith("Error"),
+                     job_urls(args), args.concurrency)
+
+
+def run_analyze(args):
+    import requests
+    from werkzeug.serving import make_server
+    import app as job_app
+
+    server = make_server('127.0.0.1', 0, job_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_port}"
+
+    def analyze(url):
+        response = requests.post(f"{endpoint}/analyze", json={"urls": [url], "force_refresh": True}, timeout=300)
+        return response.json()["results"][0].get("status") == "success"
+
+    try:
+        return timed_map(analyze, job_urls(args), args.concurrency)
+    finally:
+        server.shutdown()
+
+
+def run_cli(args):
+    import main as cli
+    from job_logic import extract_text_from_html
+
+    pages = []
+    for name in args.pages.split(','):
+        with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+            pages.append(extract_text_from_html(f.read()))
+
+    workdir = tempfile.mkdtemp(prefix='e2e_cli_')
+    try:
+        for i in range(args.jobs):
+            with open(os.path.join(workdir, f"job_{i:05d}.txt"), 'w', encoding='utf-8') as f:
+                f.write(f"{pages[i % len(pages)]}\n求人番号: {i}\n")
+
+        # Every file of a chunk gets the chunk's duration as its latency
+        outcomes = []
+        analyze_files = cli.analyze_files
+
+        def timed_analyze_files(paths, requirements, use_cache=True):
+            start = time.perf_counter()
+            records = analyze_files(paths, requirements, use_cache)
+            elapsed = time.perf_counter() - start
+            outcomes.extend((record["status"] == "success", elapsed) for record in records)
+            return records
+
+        cli.analyze_files = timed_analyze_files
+        sys.argv = ['main.py', '--batch', workdir, '--output', os.path.join(workdir, 'results.jsonl'),
+                    '--workers', str(args.concurrency), '--no-cache']
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stderr):
+            cli.main()
+        return outcomes, time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def child(args):
+    """One benchmark run inside a fresh process; prints a single result line."""
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    os.environ.setdefault("LLM_RPM", "100000")
+    os.environ.setdefault("LLM_BURST", "1000")
+    os.environ.setdefault("LLM_MAX_CONCURRENCY", "64")
+    os.environ.setdefault("ANALYZE_WORKERS", str(args.concurrency))
+    if args.no_prefilter:
+        os.environ["PREFILTER_ENABLED"] = "0"
+
+    from stub_llm import StubLLM, install_stub_model
+    install_stub_model(StubLLM(latency=args.llm_latency, jitter=args.llm_jitter, capacity=1000))
+
+    runner = {"fetch": run_fetch, "analyze": run_analyze, "cli": run_cli}[args.child]
+    outcomes, wall = runner(args)
+    latencies = [seconds for ok, seconds in outcomes if ok]
+    ok = len(latencies)
+    print(RESULT_PREFIX + json.dumps({
+        "ok": ok,
+        "errors": len(outcomes) - ok,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "jobs_per_min": ok / wall * 60 if wall else 0.0,
+        "peak_rss_mb": peak_rss_mb()
+    }))
+
+
+def run_child(args, mode, concurrency):
+    command = [
+        sys.executable, os.path.abspath(__file__), '--child', mode,
+        '--base-url', args.base_url, '--concurrency', str(concurrency), '--jobs', str(args.jobs),
+        '--variant', args.variant, '--pages', args.pages, '--slow-delay', str(args.slow_delay),
+        '--llm-latency', str(args.llm_latency), '--llm-jitter', str(args.llm_jitter)
+    ] + (['--no-prefilter'] if args.no_prefilter else [])
+    datadir = tempfile.mkdtemp(prefix='e2e_data_')
+    env = dict(
+        os.environ,
+        JOB_ANALYZER_DATA_DIR=os.path.join(datadir, 'logs'),
+        JOB_ANALYZER_CACHE_DIR=os.path.join(datadir, 'cache')
+    )
+    try:
+        proc = subprocess.run(command, cwd=APP_DIR, env=env, capture_output=True, text=True)
+    finally:
+        shutil.rmtree(datadir, ignore_errors=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    print(f"  {mode} x{concurrency} failed (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+    return None
+
+
+def format_seconds(value):
+    return f"{value * 1000:.0f}ms" if value is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline end-to-end throughput benchmark.')
+    parser.add_argument('--modes', default=','.join(MODES), help=f"Comma-separated subset of {', '.join(MODES)}")
+    parser.add_argument('--concurrency', default='1,4,8', help='Comma-separated concurrency levels')
+    parser.add_argument('--jobs', type=int, default=40, help='Jobs per run')
+    parser.add_argument('--variant', choices=VARIANTS, default='static', help='Fixture pages to fetch')
+    parser.add_argument('--pages', help='Comma-separated fixture file names (default depends on --variant)')
+    parser.add_argument('--slow-delay', type=float, default=1.0, help='Server delay for --variant slow (seconds)')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='Stub LLM latency per request (seconds)')
+    parser.add_argument('--llm-jitter', type=float, default=0.1, help='Extra random stub latency (seconds)')
+    parser.add_argument('--no-prefilter', action='store_true', help='Send every job to the (stub) LLM')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.concurrency = int(args.concurrency)
+        child(args)
+        return
+
+    args.pages = args.pages or ','.join(select_pages(args.variant))
+    server = FixtureServer().start()
+    args.base_url = server.base_url
+    print(f"Fixture server: {server.base_url} (variant={args.variant}, pages={args.pages}), "
+          f"stub LLM latency={args.llm_latency}s+{args.llm_jitter}s, {args.jobs} jobs per run")
+    print(f"\n{'mode':<8} {'conc':>4} {'ok':>5} {'err':>4} {'p50':>8} {'p95':>8} {'jobs/min':>9} {'peak RSS':>9}")
+    try:
+        for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+            for concurrency in [int(c) for c in args.concurrency.split(',')]:
+                result = run_child(args, mode, concurrency)
+                if result is None:
+                    continue
+                print(f"{mode:<8} {concurrency:>4} {result['ok']:>5} {result['errors']:>4} "
+                      f"{format_seconds(result['p50']):>8} {format_seconds(result['p95']):>8} "
+                      f"{result['jobs_per_min']:>9.1f} {result['peak_rss_mb']:>7.1f}MB")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Compares HTML-to-text extractors on the saved page corpus.
+
+Checks that every extractor produces exactly the same text as the bs4
+reference, then reports throughput per extractor.
+
+Usage:
+    python bench/extract_bench.py [--fixtures DIR] [--iterations N]
+"""
+import os
+import sys
+import time
+import glob
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractors import EXTRACTORS, lxml_html
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pages')
+
+
+def load_corpus(fixtures_dir):
+    corpus = {}
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, '*.html'))):
+        with open(path, 'rb') as f:
+            corpus[os.path.basename(path)] = f.read()
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark HTML-to-text extractors.')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Directory of saved job pages (*.html)')
+    parser.add_argument('--iterations', type=int, default=200, help='Passes over the corpus per extractor')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.fixtures)
+    if not corpus:
+        print(f"No fixtures found in {args.fixtures}")
+        sys.exit(1)
+
+    names = [name for name in EXTRACTORS if name != "lxml" or lxml_html is not None]
+    extractors = {name: EXTRACTORS[name]() for name in names}
+    total_bytes = sum(len(html) for html in corpus.values())
+    print(f"Corpus: {len(corpus)} pages, {total_bytes / 1024:.1f} KiB")
+
+    # 1. Output equivalence against the reference extractor
+    reference = {filename: extractors["bs4"].extract(html) for filename, html in corpus.items()}
+    mismatches = 0
+    for name, extractor in extractors.items():
+        for filename, html in corpus.items():
+            if extractor.extract(html) != reference[filename]:
+                mismatches += 1
+                print(f"  MISMATCH {name}: {filename}")
+    print(f"Equivalence: {'OK' if mismatches == 0 else f'{mismatches} mismatches'}")
+
+    # 2. Throughput
+    print(f"\n{'extractor':<10} {'pages/s':>10} {'MiB/s':>8} {'ms/page':>8}")
+    for name, extractor in extractors.items():
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            for html in corpus.values():
+                extractor.extract(html)
+        elapsed = time.perf_counter() - start
+        pages = args.iterations * len(corpus)
+        print(f"{name:<10} {pages / elapsed:>10.1f} {total_bytes * args.iterations / elapsed / 1024 / 1024:>8.2f} {elapsed / pages * 1000:>8.3f}")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
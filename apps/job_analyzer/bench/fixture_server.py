@@ -0,0 +1,129 @@
+"""Local HTTP server that serves the saved job pages for offline benchmarks.
+
+Routes (``<name>`` is a file in bench/fixtures/pages; query strings are
+ignored, so ``?n=1``, ``?n=2`` give distinct URLs for the same page):
+
+    /static/<name>              the page as saved
+    /slow/<name>?delay=1.5      the page after a server-side delay (default 1s)
+    /js/<name>?delay=0.3        a near-empty shell whose script inserts the page
+                                body after ``delay`` seconds, so only the
+                                browser tier can read it
+
+Usage:
+    python bench/fixture_server.py [--port 8765]
+"""
+import os
+import re
+import json
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pages')
+VARIANTS = ("static", "slow", "js")
+
+JS_SHELL = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Loading...</title></head>
+<body>
+<div id="app">読み込み中...</div>
+<script>
+setTimeout(function () {{
+  document.body.innerHTML = {body};
+}}, {delay_ms});
+</script>
+</body>
+</html>
+"""
+
+
+def _body_of(html):
+    match = re.search(r"<body[^>]*>(.*)</body>", html, re.S | re.I)
+    return match.group(1) if match else html
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    fixtures_dir = FIXTURES_DIR
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        segments = parts.path.strip('/').split('/')
+        if len(segments) != 2 or segments[0] not in VARIANTS:
+            self.send_error(404)
+            return
+        variant, name = segments
+        path = os.path.join(self.fixtures_dir, os.path.basename(name))
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+
+        delay = float(query.get('delay', ['1.0' if variant == 'slow' else '0.3'])[0])
+        if variant == 'slow':
+            time.sleep(delay)
+        elif variant == 'js':
+            html = JS_SHELL.format(body=json.dumps(_body_of(html), ensure_ascii=False), delay_ms=int(delay * 1000))
+
+        payload = html.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Runs the fixture server on a background thread; port 0 picks a free port."""
+
+    def __init__(self, host='127.0.0.1', port=0, fixtures_dir=FIXTURES_DIR):
+        handler = type('Handler', (FixtureHandler,), {'fixtures_dir': fixtures_dir})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.fixtures_dir = fixtures_dir
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page_names(self):
+        return sorted(name for name in os.listdir(self.fixtures_dir) if name.endswith('.html'))
+
+    def url(self, variant, name, n=0, delay=None):
+        query = f"?n={n}" + (f"&delay={delay}" if delay is not None else "")
+        return f"{self.base_url}/{variant}/{name}{query}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve saved job pages for offline benchmarks.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Directory of saved job pages (*.html)')
+    args = parser.parse_args()
+
+    server = FixtureServer(port=args.port, fixtures_dir=args.fixtures)
+    print(f"Serving {len(server.page_names())} pages at {server.base_url}/{{{','.join(VARIANTS)}}}/<name>")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Drives the shared LLM limiter against a throttling stub.
+
+Fires --calls requests from --threads threads at a StubLLM that only admits
+--capacity concurrent requests, with and without the AdaptiveLimiter, and
+reports successes, failed calls, throttles seen and throughput.
+
+Usage:
+    python bench/rate_limit_bench.py [--threads 10] [--calls 100] [--capacity 3]
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import AdaptiveLimiter
+from stub_llm import StubLLM
+
+
+def run(label, call, stub, threads, calls):
+    def one(_):
+        try:
+            call("求人情報")
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        outcomes = list(executor.map(one, range(calls)))
+    elapsed = time.perf_counter() - start
+    ok = sum(outcomes)
+    print(f"{label:<10} ok={ok:<5} failed={calls - ok:<5} throttled={stub.throttled:<5} "
+          f"api_calls={stub.calls:<5} {ok / elapsed * 60:>8.1f} jobs/min")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the LLM limiter against a throttling stub.')
+    parser.add_argument('--threads', type=int, default=10)
+    parser.add_argument('--calls', type=int, default=100)
+    parser.add_argument('--capacity', type=int, default=3, help='Concurrent requests the stub accepts before 429')
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--error-rate', type=float, default=0.02, help='Fraction of calls failing with 503')
+    args = parser.parse_args()
+
+    stub = StubLLM(latency=args.latency, capacity=args.capacity, error_rate=args.error_rate)
+    run("raw", stub.generate_content, stub, args.threads, args.calls)
+
+    stub = StubLLM(latency=args.latency, capacity=args.capacity, error_rate=args.error_rate)
+    limiter = AdaptiveLimiter(rate_per_minute=6000, burst=args.threads, max_concurrency=args.threads,
+                              base_delay=0.1, max_delay=2.0, max_retries=8)
+    run("limited", lambda prompt: limiter.call(stub.generate_content, prompt), stub, args.threads, args.calls)
+    print(f"final limiter state: {limiter.stats()}")
+
+
+if __name__ == "__main__":
+    main()
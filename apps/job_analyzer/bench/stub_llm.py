@@ -0,0 +1,87 @@
+"""Local stand-in for Gemini's GenerativeModel used by the benchmarks.
+
+Returns canned structured analyses after a configurable latency (plus up to
+``jitter`` seconds) and emulates server-side limits: calls beyond ``capacity``
+concurrent requests or ``rpm`` requests per minute fail with a 429, and
+``error_rate`` injects 503s. ``install_stub_model`` makes the app use a stub
+instead of the real model, so no API key is needed.
+"""
+import re
+import json
+import time
+import random
+import threading
+from types import SimpleNamespace
+
+CANNED_ANALYSIS = {
+    "rank": "B",
+    "score": 65,
+    "reasons": ["勤務地が希望条件に合っている"],
+    "concerns": ["リモートワークの頻度が不明"],
+    "criteria": [{"name": "勤務地", "match": "適合", "comment": "東京23区内"}]
+}
+
+
+class StubThrottleError(Exception):
+    code = 429
+
+
+class StubServerError(Exception):
+    code = 503
+
+
+class StubLLM:
+    def __init__(self, latency=0.2, capacity=3, rpm=None, error_rate=0.0, analysis=None, jitter=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.capacity = capacity
+        self.rpm = rpm
+        self.error_rate = error_rate
+        self.analysis = analysis or CANNED_ANALYSIS
+        self._lock = threading.Lock()
+        self._active = 0
+        self._recent = []
+        self.calls = 0
+        self.throttled = 0
+
+    def _admit(self):
+        with self._lock:
+            self.calls += 1
+            now = time.monotonic()
+            self._recent = [t for t in self._recent if now - t < 60]
+            over_rate = self.rpm is not None and len(self._recent) >= self.rpm
+            if self._active >= self.capacity or over_rate:
+                self.throttled += 1
+                raise StubThrottleError("429 Resource has been exhausted (e.g. check quota).")
+            self._active += 1
+            self._recent.append(now)
+
+    def generate_content(self, prompt, **kwargs):
+        self._admit()
+        try:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+            if random.random() < self.error_rate:
+                raise StubServerError("503 The service is currently unavailable.")
+        finally:
+            with self._lock:
+                self._active -= 1
+
+        job_ids = re.findall(r'job_id: (job-\d+)', prompt)
+        profile_ids = re.findall(r'profile_id: (profile-\d+)', prompt)
+        if job_ids:
+            text = json.dumps({"results": [dict(self.analysis, job_id=job_id) for job_id in job_ids]}, ensure_ascii=False)
+        elif profile_ids:
+            text = json.dumps({"results": [dict(self.analysis, profile_id=profile_id) for profile_id in profile_ids]},
+                              ensure_ascii=False)
+        else:
+            text = json.dumps(self.analysis, ensure_ascii=False)
+        return SimpleNamespace(text=text)
+
+
+def install_stub_model(stub):
+    """Makes the shared analyzer service hand out ``stub`` as its model."""
+    from analyzer_service import get_analyzer_service
+    service = get_analyzer_service()
+    with service._lock:
+        service._model = stub
+    return stub
@@ -0,0 +1,216 @@
+import os
+import queue
+import threading
+import atexit
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from playwright.sync_api import sync_playwright
+from metrics import span
+
+# Playwright's sync API is bound to the thread that started it, so every pooled
+# browser lives on its own worker thread and callers hand it fetch tasks.
+
+BROWSER_ARGS = [
+    '--disable-http2',
+    '--disable-blink-features=AutomationControlled',
+    '--no-sandbox',
+    '--disable-setuid-sandbox'
+]
+
+CONTEXT_OPTIONS = {
+    "user_agent": 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    "viewport": {'width': 1280, 'height': 800},
+    "device_scale_factor": 1,
+    "is_mobile": False,
+    "has_touch": False,
+    "locale": 'ja-JP',
+    "timezone_id": 'Asia/Tokyo',
+    "ignore_https_errors": True
+}
+
+EXTRA_HEADERS = {
+    "Accept-Language": "ja,en-US;q=0.9,en;q=0.8",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "Upgrade-Insecure-Requests": "1",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "none",
+    "Sec-Fetch-User": "?1"
+}
+
+
+# Resource types that never contribute to the extracted text
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet", "texttrack", "eventsource", "manifest"}
+# Analytics / ad hosts that only slow the page down
+BLOCKED_HOST_KEYWORDS = (
+    "google-analytics", "googletagmanager", "doubleclick", "googlesyndication",
+    "facebook.net", "connect.facebook", "hotjar", "criteo", "adsrvr", "yahoo-ads", "ads-twitter"
+)
+
+
+def _block_heavy_resources(route):
+    """Aborts requests for non-document resources and trackers; lets everything else through."""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(k in request.url for k in BLOCKED_HOST_KEYWORDS):
+        route.abort()
+    else:
+        route.continue_()
+
+
+class _BrowserWorker(threading.Thread):
+    """Owns one warm browser + context and renders pages handed to it by the pool."""
+
+    def __init__(self, pool, index):
+        super().__init__(name=f"browser-pool-{index}", daemon=True)
+        self.pool = pool
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.pages_served = 0
+
+    def _launch(self):
+        with span('browser_launch'):
+            self.browser = self.playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+            self.context = self.browser.new_context(**CONTEXT_OPTIONS)
+            self.context.set_extra_http_headers(EXTRA_HEADERS)
+            if self.pool.block_resources:
+                self.context.route("**/*", _block_heavy_resources)
+        self.pages_served = 0
+
+    def _close_browser(self):
+        try:
+            if self.browser:
+                self.browser.close()
+        except Exception as e:
+            print(f"Error closing pooled browser: {e}")
+        self.browser = None
+        self.context = None
+
+    def _ensure_healthy(self):
+        """Relaunches the browser if it crashed or has served its page quota."""
+        recycle = self.pages_served >= self.pool.max_pages_per_browser
+        if self.browser is None or recycle or not self.browser.is_connected():
+            self._close_browser()
+            self._launch()
+
+    def run(self):
+        try:
+            with sync_playwright() as p:
+                self.playwright = p
+                self._serve()
+        except Exception as e:
+            # Playwright itself could not start; nothing queued can be served by this worker
+            print(f"Browser worker failed: {e}")
+            self.pool._fail_pending(e)
+
+    def _serve(self):
+        while True:
+            task = self.pool._tasks.get()
+            if task is None:
+                break
+            fn, future = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._ensure_healthy()
+                page = self.context.new_page()
+                try:
+                    future.set_result(fn(page))
+                finally:
+                    self.pages_served += 1
+                    page.close()
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                # A failed page may have left the browser in a bad state
+                if self.browser is not None and not self.browser.is_connected():
+                    self._close_browser()
+        self._close_browser()
+
+
+class BrowserPool:
+    """Thread-safe pool of long-lived headless browsers.
+
+    Workers are started lazily, up to ``size``; each browser is health-checked
+    before use and recycled after ``max_pages_per_browser`` pages. With
+    ``block_resources`` images, fonts, media, CSS and trackers are aborted.
+    """
+
+    def __init__(self, size=3, max_pages_per_browser=50, block_resources=True):
+        self.size = max(1, size)
+        self.max_pages_per_browser = max(1, max_pages_per_browser)
+        self.block_resources = block_resources
+        self._tasks = queue.Queue()
+        self._workers = []
+        self._started = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Browser pool is closed")
+            # Workers whose Playwright failed to start are gone; let new ones take their place
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            # Grow one worker per pending task until the size limit is reached
+            if len(self._workers) < self.size and self._tasks.qsize() >= len(self._workers):
+                worker = _BrowserWorker(self, self._started)
+                self._started += 1
+                worker.start()
+                self._workers.append(worker)
+
+    def _fail_pending(self, error):
+        """Fails every queued task; called when a worker cannot start."""
+        while True:
+            try:
+                task = self._tasks.get_nowait()
+            except queue.Empty:
+                return
+            if task is None:
+                self._tasks.put(None)  # Shutdown signal for another worker
+                return
+            _, future = task
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+    def run(self, fn, timeout=None):
+        """Runs ``fn(page)`` on a fresh page of a pooled browser and returns its result.
+
+        Raises concurrent.futures.TimeoutError if no result arrives within
+        ``timeout`` seconds; a task still waiting in the queue is then dropped.
+        """
+        future = Future()
+        self._tasks.put((fn, future))
+        self._ensure_workers()
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+        for _ in workers:
+            self._tasks.put(None)
+        for worker in workers:
+            worker.join(timeout=10)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_browser_pool():
+    """Returns the process-wide browser pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(
+                size=int(os.getenv("BROWSER_POOL_SIZE", "3")),
+                max_pages_per_browser=int(os.getenv("BROWSER_MAX_PAGES", "50")),
+                block_resources=os.getenv("BROWSER_FETCH_MODE", "fast") == "fast"
+            )
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,118 @@
+import re
+
+# Sections the judgement depends on most; kept first when the text must shrink
+KEY_SECTION_PATTERN = re.compile(
+    r"給与|年収|月給|賃金|報酬|想定年収|勤務地|勤務時間|就業時間|リモート|在宅|テレワーク|"
+    r"必須|応募資格|求める人材|対象となる方|雇用形態|休日|残業"
+)
+# Useful but negotiable context
+SECONDARY_SECTION_PATTERN = re.compile(r"仕事内容|業務内容|募集背景|歓迎|福利厚生|待遇|技術|開発環境|企業情報|事業内容")
+# Lists of other jobs; everything under these headings is dropped
+RELATED_JOBS_PATTERN = re.compile(r"関連(する)?求人|この求人を見た人|おすすめ(の)?求人|似ている求人|新着求人|人気の求人")
+# UI debris left over from buttons and links
+BOILERPLATE_PATTERN = re.compile(
+    r"^(応募する|応募画面へ進む|この求人に応募|気になる|キープ|お気に入り|シェア|ログイン|会員登録|"
+    r"ページトップへ|求人を探す|.{0,20}をもっと見る|.{0,20}一覧へ)"
+)
+HEADING_MAX_CHARS = 20
+# Heading decoration: "■勤務地", "【給与】", "[仕事内容]", "## 応募資格"
+HEADING_MARKER_PATTERN = re.compile(r"[【】■●◆▼\[\]#]")
+# Words that may accompany a section name in a label ("必須スキル", "勤務地・勤務時間")
+LABEL_FILLER_PATTERN = re.compile(r"スキル|条件|ワーク|について|情報|詳細|[・/／、:：\s]")
+
+KEY, SECONDARY, OTHER = 0, 1, 2
+
+
+def estimate_tokens(text):
+    """Cheap token estimate; Japanese text averages roughly two characters per token."""
+    return len(text) // 2 + 1
+
+
+def _is_heading(line):
+    if len(line) > HEADING_MAX_CHARS:
+        return False
+    return bool(
+        re.match(r"^[【■●◆▼\[#]", line)
+        or KEY_SECTION_PATTERN.search(line)
+        or SECONDARY_SECTION_PATTERN.search(line)
+        or RELATED_JOBS_PATTERN.search(line)
+    )
+
+
+def _is_section_label(line):
+    """Whether a line is a bare section name such as "勤務地", "■給与" or "【仕事内容】".
+
+    Unlike _is_heading, lines carrying a value ("年収400万円〜", "リモート可")
+    do not count, so a related job's own details never end a related-jobs list.
+    """
+    if len(line) > HEADING_MAX_CHARS:
+        return False
+    label = HEADING_MARKER_PATTERN.sub("", line)
+    words = [KEY_SECTION_PATTERN, SECONDARY_SECTION_PATTERN, RELATED_JOBS_PATTERN]
+    if not any(pattern.search(label) for pattern in words):
+        return False
+    for pattern in words + [LABEL_FILLER_PATTERN]:
+        label = pattern.sub("", label)
+    return not label
+
+
+def _classify(line):
+    head = line[:HEADING_MAX_CHARS]
+    if KEY_SECTION_PATTERN.search(head):
+        return KEY
+    if SECONDARY_SECTION_PATTERN.search(head):
+        return SECONDARY
+    return OTHER
+
+
+def compact_job_text(text, token_budget=8000):
+    """Shrinks scraped job text to fit ``token_budget`` without losing the key conditions.
+
+    Repeated lines, button debris and related-job lists are removed first. If
+    the text is still too long, lines are kept by section priority (salary,
+    location, hours, remote, required skills first) and emitted in their
+    original order, so the conditions at the end of a page survive.
+    """
+    lines = []
+    seen = set()
+    section = OTHER
+    in_related = False
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line in seen or BOILERPLATE_PATTERN.match(line):
+            continue
+        seen.add(line)
+
+        if in_related:
+            # Only a real section heading ends a related-jobs list
+            if not _is_section_label(line):
+                continue
+            in_related = bool(RELATED_JOBS_PATTERN.search(line))
+            section = _classify(line)
+        elif _is_heading(line):
+            in_related = bool(RELATED_JOBS_PATTERN.search(line))
+            section = _classify(line)
+        if in_related:
+            continue
+        # An inline "【給与】月給30万円" line is key even inside another section
+        priority = min(section, _classify(line))
+        if len(lines) < 3:
+            priority = min(priority, SECONDARY)  # Job title and company name
+        lines.append((priority, line))
+
+    compacted = '\n'.join(line for _, line in lines)
+    if estimate_tokens(compacted) <= token_budget:
+        return compacted
+
+    keep = [False] * len(lines)
+    used = 0
+    for priority in (KEY, SECONDARY, OTHER):
+        for i, (line_priority, line) in enumerate(lines):
+            if line_priority != priority:
+                continue
+            cost = estimate_tokens(line)
+            if used + cost > token_budget:
+                continue
+            keep[i] = True
+            used += cost
+    return '\n'.join(line for i, (_, line) in enumerate(lines) if keep[i])
@@ -0,0 +1,151 @@
+import re
+import sqlite3
+import hashlib
+import threading
+from collections import Counter
+
+SHINGLE_SIZE = 3
+# Bumped whenever simhash() changes; stored fingerprints of another version are dropped
+FINGERPRINT_VERSION = 2
+# Beyond this the bands get so narrow that every lookup scans most of the index
+MAX_DISTANCE = 15
+LANE_BITS = 24  # Per-bit counters packed into one big int; each lane holds up to 2^24 weight
+
+# SPREAD[byte] places each bit of a byte into its own lane
+SPREAD = [sum(1 << (LANE_BITS * k) for k in range(8) if (byte >> k) & 1) for byte in range(256)]
+
+
+def _normalize(text):
+    # Digits are kept: a repost with a different salary is a different offer
+    return re.sub(r"\s+", "", text)
+
+
+def _hash64(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def simhash(text):
+    """64-bit SimHash over character shingles (works for Japanese, which has no word spaces)."""
+    normalized = _normalize(text)
+    shingles = Counter(normalized[i:i + SHINGLE_SIZE] for i in range(max(1, len(normalized) - SHINGLE_SIZE + 1)))
+
+    # Sum every shingle's bits in parallel lanes instead of looping over 64 bits per shingle
+    lanes = 0
+    total_weight = 0
+    for shingle, weight in shingles.items():
+        h = _hash64(shingle)
+        spread = 0
+        for b in range(8):
+            spread |= SPREAD[(h >> (8 * b)) & 0xFF] << (LANE_BITS * 8 * b)
+        lanes += weight * spread
+        total_weight += weight
+
+    mask = (1 << LANE_BITS) - 1
+    fingerprint = 0
+    for bit in range(64):
+        if ((lanes >> (LANE_BITS * bit)) & mask) * 2 > total_weight:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def _to_signed(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _band_ranges(max_distance):
+    """Splits 64 bits into max_distance + 1 bands.
+
+    By the pigeonhole principle, two fingerprints within max_distance bits of
+    each other are identical in at least one band.
+    """
+    bands = max_distance + 1
+    return [(64 * i // bands, 64 * (i + 1) // bands - 64 * i // bands) for i in range(bands)]
+
+
+class DedupIndex:
+    """SimHash fingerprints of analyzed job texts, persisted in SQLite.
+
+    Fingerprints are also held in memory, bucketed by band (max_distance + 1
+    bands), so a lookup is a handful of dict hits plus Hamming checks on the
+    few candidates. ``needs_rebuild`` is set when the stored fingerprints were
+    made by an older simhash() and had to be dropped.
+    """
+
+    def __init__(self, db_path, max_distance=3):
+        if not 0 <= max_distance <= MAX_DISTANCE:
+            print(f"DEDUP max_distance {max_distance} is out of range; using {min(max(max_distance, 0), MAX_DISTANCE)}")
+            max_distance = min(max(max_distance, 0), MAX_DISTANCE)
+        self.max_distance = max_distance
+        self._band_ranges = _band_ranges(max_distance)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._fingerprints = {}
+        self._bands = [dict() for _ in self._band_ranges]
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS fingerprints (log_id TEXT PRIMARY KEY, simhash INTEGER)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'fingerprint_version'").fetchone()
+            self.needs_rebuild = row is None or int(row[0]) != FINGERPRINT_VERSION
+            if self.needs_rebuild:
+                self._conn.execute("DELETE FROM fingerprints")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint_version', ?)",
+                    (str(FINGERPRINT_VERSION),)
+                )
+            rows = self._conn.execute("SELECT log_id, simhash FROM fingerprints").fetchall()
+        for log_id, value in rows:
+            self._index(log_id, value & ((1 << 64) - 1))
+
+    def _band_keys(self, fingerprint):
+        return [(fingerprint >> start) & ((1 << width) - 1) for start, width in self._band_ranges]
+
+    def _index(self, log_id, fingerprint):
+        self._fingerprints[log_id] = fingerprint
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            self._bands[band].setdefault(key, set()).add(log_id)
+
+    def add(self, log_id, text):
+        self.add_many([(log_id, text)])
+
+    def add_many(self, items):
+        """Fingerprints several (log_id, text) pairs in one transaction."""
+        fingerprints = [(log_id, simhash(text)) for log_id, text in items]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO fingerprints (log_id, simhash) VALUES (?, ?)",
+                    [(log_id, _to_signed(fingerprint)) for log_id, fingerprint in fingerprints]
+                )
+            for log_id, fingerprint in fingerprints:
+                self._index(log_id, fingerprint)
+
+    def delete(self, log_id):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM fingerprints WHERE log_id = ?", (log_id,))
+            fingerprint = self._fingerprints.pop(log_id, None)
+            if fingerprint is None:
+                return
+            for band, key in enumerate(self._band_keys(fingerprint)):
+                bucket = self._bands[band].get(key)
+                if bucket:
+                    bucket.discard(log_id)
+
+    def matches(self, text):
+        """Returns [(log_id, distance)] of indexed jobs within max_distance, closest first."""
+        fingerprint = simhash(text)
+        found = []
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(self._band_keys(fingerprint)):
+                candidates.update(self._bands[band].get(key, ()))
+            for log_id in candidates:
+                distance = bin(fingerprint ^ self._fingerprints[log_id]).count('1')
+                if distance <= self.max_distance:
+                    found.append((log_id, distance))
+        return sorted(found, key=lambda match: match[1])
+
+    def find(self, text):
+        """Returns (log_id, distance) of the closest indexed job within max_distance, or None."""
+        found = self.matches(text)
+        return found[0] if found else None
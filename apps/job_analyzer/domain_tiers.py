@@ -0,0 +1,80 @@
+import os
+import json
+import time
+import threading
+
+CACHE_ROOT = os.getenv("JOB_ANALYZER_CACHE_DIR") or os.path.join(os.path.dirname(__file__), 'cache')
+TIERS_PATH = os.path.join(CACHE_ROOT, 'domain_tiers.json')
+
+
+class DomainTiers:
+    """Remembers per domain which fetch tier ("http" or "browser") works.
+
+    A domain only goes browser-only after ``failure_threshold`` consecutive
+    failed HTTP fetches, so one slow or odd page does not demote it. Browser
+    domains get one HTTP probe every ``probe_seconds``, and entries older
+    than ``ttl_seconds`` are forgotten, so a domain that needed the browser
+    once gets another chance at the cheap HTTP path later.
+    """
+
+    def __init__(self, path=TIERS_PATH, ttl_seconds=24 * 3600, failure_threshold=3, probe_seconds=3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.failure_threshold = max(1, failure_threshold)
+        self.probe_seconds = probe_seconds
+        self._lock = threading.Lock()
+        self._tiers = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._tiers = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def get(self, domain):
+        """Returns "http", "browser" or None (unknown); a browser domain due for a probe returns None once."""
+        now = time.time()
+        with self._lock:
+            entry = self._tiers.get(domain)
+            if not entry or now - entry.get("updated_at", 0) > self.ttl_seconds:
+                return None
+            last_probe = entry.get("probed_at", entry.get("updated_at", 0))
+            if entry.get("tier") == "browser" and now - last_probe > self.probe_seconds:
+                entry["probed_at"] = now  # Only one caller probes; the outcome comes back through record_http()
+                return None
+            return entry.get("tier")
+
+    def record_http(self, domain, ok):
+        """Records whether an HTTP fetch of the domain produced usable text."""
+        now = time.time()
+        with self._lock:
+            current = self._tiers.get(domain) or {}
+            if ok:
+                fresh = now - current.get("updated_at", 0) < 3600
+                if current.get("tier") == "http" and not current.get("failures") and fresh:
+                    return
+                entry = {"tier": "http", "failures": 0, "updated_at": now}
+            else:
+                failures = current.get("failures", 0) + 1
+                tier = "browser" if failures >= self.failure_threshold else current.get("tier")
+                entry = {"tier": tier, "failures": failures, "updated_at": now, "probed_at": now}
+            self._tiers[domain] = entry
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._tiers, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+_tiers = None
+_tiers_lock = threading.Lock()
+
+def get_domain_tiers():
+    """Returns the process-wide domain tier memory, loading it on first use."""
+    global _tiers
+    with _tiers_lock:
+        if _tiers is None:
+            _tiers = DomainTiers(
+                failure_threshold=int(os.getenv("DOMAIN_TIER_FAILURES", "3")),
+                probe_seconds=int(os.getenv("DOMAIN_TIER_PROBE_SECONDS", "3600"))
+            )
+        return _tiers
@@ -0,0 +1,107 @@
+import os
+from bs4 import BeautifulSoup
+from bs4.dammit import UnicodeDammit
+
+try:
+    from lxml import html as lxml_html
+    from lxml import etree
+except ImportError:
+    lxml_html = None
+
+# Elements that never contain job description text
+NOISE_TAGS = [
+    "script", "style", "header", "footer", "nav", "noscript",
+    "aside", "iframe", "svg", "button", "input", "form"
+]
+
+
+def clean_lines(text):
+    """Strips lines and drops empty / very short ones (often debris)."""
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped and len(stripped) > 2:
+            lines.append(stripped)
+    return '\n'.join(lines)
+
+
+class HtmlExtractor:
+    """Turns a job page's HTML (str or bytes) into cleaned main text."""
+
+    name = "base"
+
+    def extract(self, content):
+        raise NotImplementedError
+
+
+class BeautifulSoupExtractor(HtmlExtractor):
+    """Reference implementation on top of BeautifulSoup's html.parser."""
+
+    name = "bs4"
+
+    def extract(self, content):
+        soup = BeautifulSoup(content, 'html.parser')
+
+        for element in soup(NOISE_TAGS):
+            element.decompose()
+
+        # Focus on main content if possible (common job site structures)
+        main_content = soup.find('main') or soup.find('div', id='content') or soup.find('div', class_='content') or soup
+
+        return clean_lines(main_content.get_text(separator='\n'))
+
+
+class LxmlExtractor(HtmlExtractor):
+    """Single-pass lxml implementation producing the same text as BeautifulSoupExtractor."""
+
+    name = "lxml"
+
+    # itertext() already skips comments and processing instructions; removing them would merge
+    # the text around them. <template> content is dropped because BeautifulSoup's get_text skips it.
+    NOISE_XPATH = " | ".join(f"//{tag}" for tag in NOISE_TAGS + ["template"])
+    MAIN_XPATHS = [
+        "//main",
+        "//div[@id='content']",
+        "//div[contains(concat(' ', normalize-space(@class), ' '), ' content ')]",
+    ]
+
+    def extract(self, content):
+        if isinstance(content, bytes):
+            # Decode exactly the way BeautifulSoup would (declared charset, then sniffing)
+            content = UnicodeDammit(content, is_html=True).unicode_markup or ""
+        try:
+            root = lxml_html.document_fromstring(content)
+        except (etree.ParserError, ValueError):
+            # Empty documents or XML declarations lxml refuses; let the reference parser decide
+            return BeautifulSoupExtractor().extract(content)
+
+        # drop_tree keeps each element's tail text, like BeautifulSoup's decompose
+        for element in root.xpath(self.NOISE_XPATH):
+            element.drop_tree()
+
+        main_content = root
+        for xpath in self.MAIN_XPATHS:
+            found = root.xpath(xpath)
+            if found:
+                main_content = found[0]
+                break
+
+        return clean_lines('\n'.join(main_content.itertext()))
+
+
+EXTRACTORS = {
+    BeautifulSoupExtractor.name: BeautifulSoupExtractor,
+    LxmlExtractor.name: LxmlExtractor,
+}
+
+def get_extractor(name=None):
+    """Returns an extractor by name; "auto" (default) prefers lxml when installed."""
+    name = name or os.getenv("HTML_EXTRACTOR", "auto")
+    if name == "auto":
+        name = "lxml" if lxml_html is not None else "bs4"
+    if name == "lxml" and lxml_html is None:
+        print("lxml is not installed, falling back to the bs4 extractor.")
+        name = "bs4"
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML extractor: {name}")
+    return EXTRACTORS[name]()
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# JOB_ANALYZER_CACHE_DIR moves every on-disk cache (pages, analyses, domain tiers) elsewhere
+CACHE_ROOT = os.getenv("JOB_ANALYZER_CACHE_DIR") or os.path.join(os.path.dirname(__file__), 'cache')
+CACHE_DIR = os.path.join(CACHE_ROOT, 'fetch')
+
+# Query parameters that only track the visitor and never change the page content
+TRACKING_PARAMS = {"betk", "jrtk", "gclid", "fbclid", "yclid", "msclkid", "_ga", "ref", "src"}
+TRACKING_PREFIXES = ("utm_",)
+# Eviction trims the cache to this fraction of max_bytes, so the next full scan is many writes away
+EVICT_TARGET_RATIO = 0.9
+
+
+def normalize_url(url):
+    """Normalizes a URL so that the same job page always maps to the same key."""
+    parts = urlsplit(url.strip())
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+    path = parts.path or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
+
+
+class FetchCache:
+    """Disk-backed cache of extracted page text with TTL and LRU size eviction.
+
+    Entries are stored as one JSON file per normalized URL; the file mtime is
+    bumped on every hit and used as the LRU clock. The total size is tracked
+    on writes, and the directory is only scanned once it exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl_seconds=7 * 24 * 3600, max_bytes=200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None  # Unknown until the first scan
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, url):
+        key = hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, url):
+        """Returns the cached text for the URL, or None if missing or expired."""
+        path = self._path(url)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if time.time() - entry.get("fetched_at", 0) > self.ttl_seconds:
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get("text")
+
+    def set(self, url, text):
+        entry = {
+            "url": normalize_url(url),
+            "fetched_at": time.time(),
+            "text": text
+        }
+        path = self._path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        new_size = os.path.getsize(tmp_path)
+        with self._lock:
+            old_size = self._file_size(path)
+            os.replace(tmp_path, path)
+            if self._total_bytes is not None:
+                self._total_bytes += new_size - old_size
+            if self._total_bytes is None or self._total_bytes > self.max_bytes:
+                self._evict_locked()
+
+    @staticmethod
+    def _file_size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _remove(self, path):
+        size = self._file_size(path)
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def _evict_locked(self):
+        """Rescans the directory; if over max_bytes, removes least recently used entries down to the target."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICT_TARGET_RATIO
+            entries.sort()
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+        self._total_bytes = total
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_fetch_cache():
+    """Returns the process-wide fetch cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FetchCache(
+                ttl_seconds=int(os.getenv("FETCH_CACHE_TTL", str(7 * 24 * 3600))),
+                max_bytes=int(os.getenv("FETCH_CACHE_MAX_MB", "200")) * 1024 * 1024
+            )
+        return _cache
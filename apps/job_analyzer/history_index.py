@@ -0,0 +1,262 @@
+import os
+import json
+import sqlite3
+import threading
+
+from analyzer_service import DEFAULT_PROFILE
+
+SORT_COLUMNS = {
+    "timestamp": "timestamp",
+    "score": "score",
+    # S > A > B > C > anything else
+    "rank": "CASE rank WHEN 'S' THEN 4 WHEN 'A' THEN 3 WHEN 'B' THEN 2 WHEN 'C' THEN 1 ELSE 0 END",
+}
+
+# The trigram tokenizer matches substrings of 3+ characters, which suits
+# Japanese (no word spaces); shorter terms fall back to LIKE
+MIN_MATCH_CHARS = 3
+SEARCH_COLUMNS = ("url", "job_rank", "job_text", "markdown")
+
+
+def _fts_phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+class HistoryIndex:
+    """SQLite index of analysis summaries so /history never opens the full logs."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS history (
+                    id TEXT PRIMARY KEY,
+                    url TEXT,
+                    rank TEXT,
+                    score INTEGER,
+                    timestamp TEXT,
+                    status TEXT,
+                    requirements_version TEXT,
+                    profile TEXT NOT NULL DEFAULT 'default',
+                    unrecoverable INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(history)")]
+            if "requirements_version" not in columns:
+                self._conn.execute("ALTER TABLE history ADD COLUMN requirements_version TEXT")
+            if "profile" not in columns:
+                # Results from before named profiles were all scored against requirements.md
+                self._conn.execute(f"ALTER TABLE history ADD COLUMN profile TEXT NOT NULL DEFAULT '{DEFAULT_PROFILE}'")
+            if "unrecoverable" not in columns:
+                self._conn.execute("ALTER TABLE history ADD COLUMN unrecoverable INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history(timestamp)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_score ON history(score)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_rank ON history(rank)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_profile ON history(profile)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            try:
+                self._conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5("
+                    "url, job_rank, job_text, markdown, tokenize='trigram')"
+                )
+                # Maps log ids to FTS rowids so updates and deletes never scan the FTS table
+                self._conn.execute("CREATE TABLE IF NOT EXISTS search_docs (docid INTEGER PRIMARY KEY, id TEXT UNIQUE)")
+                self.search_enabled = True
+            except sqlite3.OperationalError as e:
+                # FTS5 trigram needs SQLite 3.34+
+                print(f"Full-text search disabled: {e}")
+                self.search_enabled = False
+
+    def add(self, result_data):
+        """Inserts or updates the summary row of a result."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO history (id, url, rank, score, timestamp, status, requirements_version, profile) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    result_data.get("id"),
+                    result_data.get("url"),
+                    result_data.get("rank"),
+                    result_data.get("score", 0) or 0,
+                    result_data.get("timestamp"),
+                    result_data.get("status"),
+                    result_data.get("requirements_version"),
+                    result_data.get("profile") or DEFAULT_PROFILE
+                )
+            )
+
+    def get(self, log_id):
+        """Returns the summary row of one log, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, url, rank, score, timestamp, status, requirements_version, profile, unrecoverable "
+                "FROM history WHERE id = ?",
+                (log_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def stale_ids(self, requirements_version, profile=DEFAULT_PROFILE):
+        """Ids of a profile's results scored against other requirements, best rank and newest first.
+
+        Results marked unrecoverable (no job text left to re-score) are left out.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM history WHERE status = 'success' AND profile = ? AND unrecoverable = 0 "
+                "AND (requirements_version IS NULL OR requirements_version != ?) "
+                f"ORDER BY {SORT_COLUMNS['rank']} DESC, timestamp DESC",
+                (profile, requirements_version)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def mark_unrecoverable(self, log_id):
+        """Flags a result that cannot be re-scored, so later passes skip it."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE history SET unrecoverable = 1 WHERE id = ?", (log_id,))
+
+    def delete(self, log_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM history WHERE id = ?", (log_id,))
+            if self.search_enabled:
+                self._conn.execute(
+                    "DELETE FROM history_fts WHERE rowid = (SELECT docid FROM search_docs WHERE id = ?)", (log_id,)
+                )
+                self._conn.execute("DELETE FROM search_docs WHERE id = ?", (log_id,))
+
+    def index_text(self, log_id, url, rank, job_text, markdown):
+        """Adds (or replaces) the searchable text of a result."""
+        if not self.search_enabled:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO search_docs (id) VALUES (?)", (log_id,))
+            docid = self._conn.execute("SELECT docid FROM search_docs WHERE id = ?", (log_id,)).fetchone()[0]
+            self._conn.execute("DELETE FROM history_fts WHERE rowid = ?", (docid,))
+            self._conn.execute(
+                "INSERT INTO history_fts (rowid, url, job_rank, job_text, markdown) VALUES (?, ?, ?, ?, ?)",
+                (docid, url or "", rank or "", job_text or "", markdown or "")
+            )
+
+    def backfill_search(self, entries):
+        """Indexes (id, url, rank, job_text, markdown) tuples once, for results written before search existed."""
+        if not self.search_enabled:
+            return
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'search_indexed'").fetchone()
+        if row:
+            return
+
+        count = 0
+        for entry in entries:
+            self.index_text(*entry)
+            count += 1
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('search_indexed', '1')")
+        print(f"Indexed {count} results for search.")
+
+    def search(self, query, page=1, per_page=20, rank=None):
+        """Returns (rows, total) of results whose text contains every whitespace-separated term.
+
+        Rows carry the history summary plus a ``snippet`` around the match,
+        best matches first.
+        """
+        terms = query.split()
+        long_terms = [term for term in terms if len(term) >= MIN_MATCH_CHARS]
+        short_terms = [term for term in terms if len(term) < MIN_MATCH_CHARS]
+
+        where = []
+        params = []
+        if long_terms:
+            where.append("history_fts MATCH ?")
+            params.append(" AND ".join(_fts_phrase(term) for term in long_terms))
+        for term in short_terms:
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where.append("(" + " OR ".join(f"history_fts.{column} LIKE ? ESCAPE '\\'" for column in SEARCH_COLUMNS) + ")")
+            params.extend([pattern] * len(SEARCH_COLUMNS))
+        if rank:
+            ranks = [r.strip() for r in rank.split(',') if r.strip()]
+            where.append(f"history_fts.job_rank IN ({', '.join('?' for _ in ranks)})")
+            params.extend(ranks)
+        if not where:
+            return [], 0
+        where_sql = " AND ".join(where)
+        # bm25 needs a MATCH; LIKE-only queries are ordered by recency
+        order_sql = "bm25(history_fts), h.timestamp DESC" if long_terms else "h.timestamp DESC"
+
+        page = max(1, page)
+        per_page = max(1, min(per_page, 100))
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM history_fts WHERE {where_sql}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT h.id, h.url, h.rank, h.score, h.timestamp, h.status, h.requirements_version, h.profile, h.unrecoverable, "
+                f"snippet(history_fts, -1, '[', ']', '…', 16) AS snippet "
+                f"FROM history_fts JOIN search_docs d ON d.docid = history_fts.rowid JOIN history h ON h.id = d.id "
+                f"WHERE {where_sql} ORDER BY {order_sql} LIMIT ? OFFSET ?",
+                params + [per_page, (page - 1) * per_page]
+            ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def migrate_from_logs(self, logs_dir):
+        """Indexes existing JSON logs once; later results are added as they are written."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'json_logs_migrated'").fetchone()
+        if row:
+            return
+
+        count = 0
+        for filename in os.listdir(logs_dir):
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(logs_dir, filename)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"Skipping unreadable log {filename}: {e}")
+                continue
+            data.setdefault("id", filename[:-len('.json')])
+            self.add(data)
+            count += 1
+
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_logs_migrated', '1')")
+        print(f"Indexed {count} existing logs.")
+
+    def query(self, page=1, per_page=50, sort="timestamp", order="desc", rank=None, min_score=None, max_score=None,
+              profile=None):
+        """Returns (rows, total) for one page of history matching the filters."""
+        where = []
+        params = []
+        if profile:
+            profiles = [p.strip() for p in profile.split(',') if p.strip()]
+            where.append(f"profile IN ({', '.join('?' for _ in profiles)})")
+            params.extend(profiles)
+        if rank:
+            ranks = [r.strip() for r in rank.split(',') if r.strip()]
+            where.append(f"rank IN ({', '.join('?' for _ in ranks)})")
+            params.extend(ranks)
+        if min_score is not None:
+            where.append("score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            where.append("score <= ?")
+            params.append(max_score)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+        sort_sql = SORT_COLUMNS.get(sort, SORT_COLUMNS["timestamp"])
+        order_sql = "ASC" if str(order).lower() == "asc" else "DESC"
+        page = max(1, page)
+        per_page = max(1, min(per_page, 500))
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM history {where_sql}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT id, url, rank, score, timestamp, status, requirements_version, profile, unrecoverable "
+                f"FROM history {where_sql} "
+                f"ORDER BY {sort_sql} {order_sql}, timestamp DESC LIMIT ? OFFSET ?",
+                params + [per_page, (page - 1) * per_page]
+            ).fetchall()
+        return [dict(row) for row in rows], total
@@ -1,7 +1,9 @@
 import os
 import sys
 import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
 import markdown
 import google.generativeai as genai
 from dotenv import load_dotenv
@@ -28,146 +30,455 @@ def save_file(filepath, content):
         print(f"Error saving file: {e}")
         return False
 
-from playwright.sync_api import sync_playwright
+from browser_pool import get_browser_pool, CONTEXT_OPTIONS, EXTRA_HEADERS
+from domain_tiers import get_domain_tiers
+from extractors import get_extractor
+from fetch_cache import get_fetch_cache
+from analysis_cache import get_analysis_cache, make_key
+from compaction import compact_job_text, estimate_tokens
+from analysis_schema import (
+    RESPONSE_SCHEMA, BATCH_RESPONSE_SCHEMA, PROFILE_BATCH_RESPONSE_SCHEMA, parse_analysis, parse_batch_analysis
+)
+from rate_limiter import get_llm_limiter
+from analyzer_service import get_analyzer_service, MODEL_NAME
+from prefilter import get_prefilter
+from metrics import span, current_trace, attach_trace, record_cache
 
-def fetch_text_from_url(url):
-    """Fetches text content from a URL using Playwright (Headless Browser) with enhanced robustness."""
+# Bump whenever the prompt changes so cached analyses are not reused across formats
+PROMPT_VERSION = 'v3-compact'
+
+html_extractor = get_extractor()
+
+# Static HTML shorter than this (after extraction) is assumed to need JS rendering
+MIN_STATIC_TEXT_LENGTH = 500
+# Phrases that show up on bot walls / JS-required placeholder pages instead of the job
+BOT_WALL_MARKERS = [
+    "captcha", "access denied", "just a moment", "enable javascript",
+    "javascriptを有効", "アクセスが集中", "ロボットではありません"
+]
+
+# Shared keep-alive session for the plain HTTP fast path
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(pool_connections=20, pool_maxsize=20))
+http_session.mount('http://', HTTPAdapter(pool_connections=20, pool_maxsize=20))
+http_session.headers.update(EXTRA_HEADERS)
+http_session.headers["User-Agent"] = CONTEXT_OPTIONS["user_agent"]
+
+# "fast" blocks heavy resources and waits for content readiness; "full" is the
+# original networkidle + fixed sleep behaviour, kept for sites that need it
+BROWSER_FETCH_MODE = os.getenv("BROWSER_FETCH_MODE", "fast")
+# Upper bound on waiting for a pooled browser, including time spent queued
+BROWSER_FETCH_TIMEOUT = float(os.getenv("BROWSER_FETCH_TIMEOUT", "120"))
+MAIN_CONTENT_SELECTOR = "main, div#content, div.content"
+
+def _wait_for_content_ready(page, timeout_ms=8000, poll_ms=250):
+    """Waits until the main content exists and the page text stops growing."""
     try:
-        with sync_playwright() as p:
-            # Using higher quality browser launch arguments
-            browser = p.chromium.launch(
-                headless=True,
-                args=[
-                    '--disable-http2',
-                    '--disable-blink-features=AutomationControlled',
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox'
-                ]
-            )
-            
-            # Context with more complete browser fingerprint
-            context = browser.new_context(
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                viewport={'width': 1280, 'height': 800},
-                device_scale_factor=1,
-                is_mobile=False,
-                has_touch=False,
-                locale='ja-JP',
-                timezone_id='Asia/Tokyo',
-                ignore_https_errors=True
-            )
-            
-            page = context.new_page()
-            
-            # Set additional headers
-            page.set_extra_http_headers({
-                "Accept-Language": "ja,en-US;q=0.9,en;q=0.8",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-                "Upgrade-Insecure-Requests": "1",
-                "Sec-Fetch-Dest": "document",
-                "Sec-Fetch-Mode": "navigate",
-                "Sec-Fetch-Site": "none",
-                "Sec-Fetch-User": "?1"
-            })
-
-            # Go to URL with slightly longer timeout and better wait strategy
-            # Use 'networkidle' for more reliable content loading on JS-heavy sites
-            try:
-                page.goto(url, timeout=45000, wait_until='networkidle')
-            except Exception as e:
-                print(f"Networkidle failed, falling back to domcontentloaded: {e}")
-                page.goto(url, timeout=30000, wait_until='domcontentloaded')
-
-            # Wait a bit just in case of slow JS rendering
-            page.wait_for_timeout(2000)
-            
-            # Get content
-            content = page.content()
-            browser.close()
-            
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # Remove exhaustive list of noise elements
-            noise_elements = [
-                "script", "style", "header", "footer", "nav", "noscript", 
-                "aside", "iframe", "svg", "button", "input", "form"
-            ]
-            for element in soup(noise_elements):
-                element.decompose()
-                
-            # Focus on main content if possible (common job site structures)
-            main_content = soup.find('main') or soup.find('div', id='content') or soup.find('div', class_='content') or soup
-            
-            text = main_content.get_text(separator='\n')
-            
-            # Clean text thoroughly
-            lines = []
-            for line in text.splitlines():
-                stripped = line.strip()
-                if stripped and len(stripped) > 2: # Ignore very short lines (often debris)
-                    lines.append(stripped)
-            
-            cleaned_text = '\n'.join(lines)
-            
-            # If cleaned text is too short, the scraping might have failed or hit a bot wall
-            if len(cleaned_text) < 100:
-                return f"Error: Fetched content is too short ({len(cleaned_text)} chars). Site might be blocking or content is empty."
-            
-            return cleaned_text
+        page.wait_for_selector(MAIN_CONTENT_SELECTOR, timeout=min(timeout_ms, 3000), state='attached')
+    except Exception:
+        pass  # Not every site has a main container; fall back to text stabilization
+
+    last_length = -1
+    stable_polls = 0
+    waited = 0
+    while waited < timeout_ms:
+        try:
+            length = page.evaluate("() => document.body ? document.body.innerText.length : 0")
+        except Exception:
+            # A JS / meta redirect destroyed the execution context; keep polling the new document
+            length = -1
+        if length >= 100 and length == last_length:
+            stable_polls += 1
+            if stable_polls >= 2:
+                return
+        else:
+            stable_polls = 0
+        last_length = length
+        page.wait_for_timeout(poll_ms)
+        waited += poll_ms
 
+def _render_page(page, url):
+    """Loads the URL in a pooled page and returns the rendered HTML."""
+    if BROWSER_FETCH_MODE == 'fast':
+        with span('page_goto'):
+            page.goto(url, timeout=30000, wait_until='domcontentloaded')
+        with span('content_wait'):
+            _wait_for_content_ready(page)
+        try:
+            return page.content()
+        except Exception:
+            # Still navigating after a late redirect; read the new document once it is parsed
+            page.wait_for_load_state('domcontentloaded', timeout=30000)
+            return page.content()
+
+    # Go to URL with slightly longer timeout and better wait strategy
+    # Use 'networkidle' for more reliable content loading on JS-heavy sites
+    with span('page_goto'):
+        try:
+            page.goto(url, timeout=45000, wait_until='networkidle')
+        except Exception as e:
+            print(f"Networkidle failed, falling back to domcontentloaded: {e}")
+            page.goto(url, timeout=30000, wait_until='domcontentloaded')
+
+    # Wait a bit just in case of slow JS rendering
+    with span('content_wait'):
+        page.wait_for_timeout(2000)
+
+    return page.content()
+
+def extract_text_from_html(content):
+    """Extracts the cleaned main text from a job page's HTML."""
+    with span('extract'):
+        return html_extractor.extract(content)
+
+def looks_like_bot_wall(text):
+    """Returns True if extracted text looks like a block page rather than a job posting."""
+    head = text[:2000].lower()
+    return any(marker in head for marker in BOT_WALL_MARKERS)
+
+def _fetch_text_via_http(url):
+    """Fast path: plain HTTP GET + extraction. Returns None when the page needs a browser."""
+    try:
+        with span('http_fetch'):
+            response = http_session.get(url, timeout=15)
+        if response.status_code != 200 or 'html' not in response.headers.get('Content-Type', 'text/html'):
+            return None
+        # Pass bytes so the HTML parser honours the page's own charset declaration
+        cleaned_text = extract_text_from_html(response.content)
     except Exception as e:
-        print(f"Error fetching URL with Playwright: {e}")
-        return f"Error fetching URL: {e}"
+        print(f"HTTP fetch failed, falling back to browser: {e}")
+        return None
+
+    if len(cleaned_text) < MIN_STATIC_TEXT_LENGTH or looks_like_bot_wall(cleaned_text):
+        return None
+    return cleaned_text
+
+def _fetch_text_via_browser(url):
+    """Slow path: render the page in a pooled headless browser (Playwright)."""
+    trace = current_trace()
+
+    def render(page):
+        # Runs on the browser worker thread; attribute its spans to this request
+        with attach_trace(trace):
+            return _render_page(page, url)
+
+    with span('browser_fetch'):
+        try:
+            content = get_browser_pool().run(render, timeout=BROWSER_FETCH_TIMEOUT)
+        except FutureTimeoutError:
+            raise RuntimeError(f"browser did not render the page within {BROWSER_FETCH_TIMEOUT:.0f}s")
+    return extract_text_from_html(content)
+
+def fetch_text_from_url(url, force_refresh=False):
+    """Fetches text content from a URL, trying plain HTTP before a headless browser.
+
+    The tier that worked is remembered per domain so later URLs skip straight to
+    it. Successful fetches are cached on disk by normalized URL; pass
+    ``force_refresh=True`` to bypass the cache and re-fetch the page.
+    """
+    cache = get_fetch_cache()
+    if not force_refresh:
+        cached_text = cache.get(url)
+        record_cache('fetch', bool(cached_text))
+        if cached_text:
+            return cached_text
+
+    domain = urlsplit(url).netloc.lower()
+    tiers = get_domain_tiers()
+
+    try:
+        cleaned_text = None
+        if tiers.get(domain) != 'browser':
+            cleaned_text = _fetch_text_via_http(url)
+            tiers.record_http(domain, cleaned_text is not None)
+
+        if cleaned_text is None:
+            cleaned_text = _fetch_text_via_browser(url)
+
+        # If cleaned text is too short, the scraping might have failed or hit a bot wall
+        if len(cleaned_text) < 100:
+            return f"Error: Fetched content is too short ({len(cleaned_text)} chars). Site might be blocking or content is empty."
+
+        cache.set(url, cleaned_text)
+        return cleaned_text
 
     except Exception as e:
-        print(f"Error fetching URL with Playwright: {e}")
+        print(f"Error fetching URL: {e}")
         return f"Error fetching URL: {e}"
 
 def generate_html_report_content(markdown_content):
     """Generates HTML content from Markdown (body only, no full html wrapper)."""
-    return markdown.markdown(markdown_content)
+    with span('render_html'):
+        return markdown.markdown(markdown_content)
 
-def analyze_job_content(job_description, requirements):
-    """Analyzes the job description against requirements using Gemini."""
-    
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        return "Error: GEMINI_API_KEY not found."
+# Tokens of (compacted) job text sent to the model per job
+JOB_TOKEN_BUDGET = int(os.getenv("JOB_TOKEN_BUDGET", "8000"))
+# Rough budget for one batched request (prompt + expected output), and the output reserved per job
+BATCH_TOKEN_BUDGET = int(os.getenv("BATCH_TOKEN_BUDGET", "60000"))
+BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "8"))
+OUTPUT_TOKENS_PER_JOB = 800
 
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.0-flash')
-
-    prompt = f"""
+PROMPT_HEADER = """
     あなたは優秀なキャリアアドバイザーです。
     以下の「求人情報」とユーザーの「希望条件」を比較し、この求人がユーザーにおすすめできるかどうかを判定してください。
+"""
+
+OUTPUT_FORMAT = """
+    - rank: 総合判定 (S/A/B/C)
+    - score: 適合スコア (0-100の整数)
+    - reasons: 推奨理由のリスト
+    - concerns: 懸念点のリスト
+    - criteria: 各希望条件に対する適合度 (name: 条件名, match: 適合/一部適合/不適合/不明, comment: 解説)
+"""
+
+def _generate_json(prompt, schema):
+    """Calls Gemini with a JSON response schema and returns the raw response text.
+
+    Every model call goes through the shared limiter (rate, adaptive
+    concurrency, retries with backoff and the circuit breaker).
+    """
+    model = get_analyzer_service().get_model()
+    with span('llm_call'):
+        response = get_llm_limiter().call(
+            model.generate_content,
+            prompt,
+            generation_config=genai.GenerationConfig(
+                response_mime_type="application/json",
+                response_schema=schema
+            )
+        )
+    return response.text
 
+def analyze_job_content(job_description, requirements, force_refresh=False):
+    """Analyzes the job description against requirements using Gemini.
+
+    Returns a validated analysis dict (rank, score, reasons, concerns,
+    criteria), or ``{"error": message}`` on failure. Jobs that clearly fail a
+    must-have in the requirements are answered locally as rank C. Results are
+    memoized on the job text, requirements, model and prompt version; pass
+    ``force_refresh=True`` to call the model again.
+    """
+    with span('prefilter'):
+        rejected = get_prefilter().check(job_description, requirements)
+    if rejected:
+        return rejected
+    return _analyze_single(job_description, requirements, force_refresh)
+
+def is_analysis_cached(job_description, requirements):
+    """Whether an analysis of exactly this text and requirements is in the cache."""
+    return get_analysis_cache().get(make_key(job_description, requirements, MODEL_NAME, PROMPT_VERSION)) is not None
+
+def _analyze_single(job_description, requirements, force_refresh=False):
+    """Cache lookup plus one Gemini call for a job that passed the pre-filter."""
+    cache = get_analysis_cache()
+    cache_key = make_key(job_description, requirements, MODEL_NAME, PROMPT_VERSION)
+    if not force_refresh:
+        cached = cache.get(cache_key)
+        record_cache('analysis', bool(cached))
+        if cached:
+            return cached
+
+    with span('compact'):
+        job_text = compact_job_text(job_description, JOB_TOKEN_BUDGET)
+
+    prompt = f"""{PROMPT_HEADER}
     ## 希望条件
     {requirements}
 
     ## 求人情報
-    {job_description[:20000]} 
+    {job_text}
 
     ## 出力フォーマット
-    以下のMarkdown形式で出力してください。見出しなどは適切に使用してください。
+    指定されたJSONスキーマに従って出力してください。
+    {OUTPUT_FORMAT}
+    """
+
+    try:
+        response_text = _generate_json(prompt, RESPONSE_SCHEMA)
+        with span('parse_result'):
+            analysis = parse_analysis(response_text)
+        cache.set(cache_key, analysis)
+        return analysis
+    except Exception as e:
+        return {"error": f"Error analyzing job: {e}"}
 
-    # 総合判定: [S/A/B/C]
-    適合スコア: [0-100の数値]
-    
-    ## 推奨理由
-    - (理由1)
-    - (理由2)
+def _pack_batches(jobs, requirements):
+    """Groups (index, text) pairs so each batch fits the token budget and job limit."""
+    base_tokens = estimate_tokens(PROMPT_HEADER + OUTPUT_FORMAT + requirements)
+    batches = []
+    current = []
+    current_tokens = base_tokens
+    for index, text in jobs:
+        job_tokens = estimate_tokens(text) + OUTPUT_TOKENS_PER_JOB
+        if current and (current_tokens + job_tokens > BATCH_TOKEN_BUDGET or len(current) >= BATCH_MAX_JOBS):
+            batches.append(current)
+            current = []
+            current_tokens = base_tokens
+        current.append((index, text))
+        current_tokens += job_tokens
+    if current:
+        batches.append(current)
+    return batches
 
-    ## 懸念点
-    - (懸念点1)
-    - (懸念点2)
+def _analyze_batch(batch, requirements):
+    """Analyzes one packed batch of compacted texts in a single request; returns {index: analysis}."""
+    job_sections = "\n".join(
+        f"""
+    ## 求人情報 (job_id: job-{index})
+    {text}
+""" for index, text in batch
+    )
+    prompt = f"""{PROMPT_HEADER}
+    複数の求人情報が含まれています。求人ごとに独立して判定してください。
 
-    ## 詳細分析
-    (各希望条件に対する適合度を解説)
+    ## 希望条件
+    {requirements}
+    {job_sections}
+    ## 出力フォーマット
+    指定されたJSONスキーマに従い、results に求人ごとの判定を1件ずつ、対応する job_id を付けて出力してください。
+    {OUTPUT_FORMAT}
     """
 
-    try:
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        return f"Error analyzing job: {e}"
+    response_text = _generate_json(prompt, BATCH_RESPONSE_SCHEMA)
+    with span('parse_result'):
+        by_job_id = parse_batch_analysis(response_text)
+    return {index: by_job_id[f"job-{index}"] for index, _ in batch if f"job-{index}" in by_job_id}
+
+def analyze_jobs_batch(job_descriptions, requirements, force_refresh=False):
+    """Analyzes many jobs with as few Gemini requests as possible.
+
+    Jobs are packed into batched prompts sized to BATCH_TOKEN_BUDGET. Any job
+    missing from (or malformed in) a batched response, or belonging to a batch
+    whose request failed, falls back to a single-job call. Returns results in
+    input order, with the same shape as analyze_job_content.
+    """
+    cache = get_analysis_cache()
+    prefilter = get_prefilter()
+    results = [None] * len(job_descriptions)
+    pending = []
+    for index, text in enumerate(job_descriptions):
+        with span('prefilter'):
+            rejected = prefilter.check(text, requirements)
+        if rejected:
+            results[index] = rejected
+            continue
+        cached = None if force_refresh else cache.get(make_key(text, requirements, MODEL_NAME, PROMPT_VERSION))
+        if not force_refresh:
+            record_cache('analysis', bool(cached))
+        if cached:
+            results[index] = cached
+        else:
+            pending.append((index, text))
+
+    with span('compact'):
+        compacted = [(index, compact_job_text(text, JOB_TOKEN_BUDGET)) for index, text in pending]
+
+    for batch in _pack_batches(compacted, requirements):
+        if len(batch) == 1:
+            continue  # Handled by the single-job fallback below
+        try:
+            analyses = _analyze_batch(batch, requirements)
+        except Exception as e:
+            print(f"Batch analysis failed, falling back to single-job calls: {e}")
+            continue
+        for index, analysis in analyses.items():
+            cache.set(make_key(job_descriptions[index], requirements, MODEL_NAME, PROMPT_VERSION), analysis)
+            results[index] = analysis
+
+    for index, text in pending:
+        if results[index] is None:
+            results[index] = _analyze_single(text, requirements, force_refresh=True)
+    return results
+
+def _pack_profiles(job_text, profiles):
+    """Groups (name, requirements) pairs so each request for one job fits the token budget and limit."""
+    base_tokens = estimate_tokens(PROMPT_HEADER + OUTPUT_FORMAT + job_text)
+    batches = []
+    current = []
+    current_tokens = base_tokens
+    for name, requirements in profiles:
+        profile_tokens = estimate_tokens(requirements) + OUTPUT_TOKENS_PER_JOB
+        if current and (current_tokens + profile_tokens > BATCH_TOKEN_BUDGET or len(current) >= BATCH_MAX_JOBS):
+            batches.append(current)
+            current = []
+            current_tokens = base_tokens
+        current.append((name, requirements))
+        current_tokens += profile_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def _analyze_profiles(job_text, batch):
+    """Scores one compacted job against several profiles in a single request; returns {name: analysis}."""
+    profile_sections = "\n".join(
+        f"""
+    ## 希望条件 (profile_id: profile-{index})
+    {requirements}
+""" for index, (_, requirements) in enumerate(batch)
+    )
+    prompt = f"""{PROMPT_HEADER}
+    複数の希望条件（プロファイル）が含まれています。プロファイルごとに独立して判定してください。
+    {profile_sections}
+    ## 求人情報
+    {job_text}
+
+    ## 出力フォーマット
+    指定されたJSONスキーマに従い、results にプロファイルごとの判定を1件ずつ、対応する profile_id を付けて出力してください。
+    {OUTPUT_FORMAT}
+    """
+
+    response_text = _generate_json(prompt, PROFILE_BATCH_RESPONSE_SCHEMA)
+    with span('parse_result'):
+        by_profile_id = parse_batch_analysis(response_text, id_field="profile_id")
+    return {
+        name: by_profile_id[f"profile-{index}"]
+        for index, (name, _) in enumerate(batch) if f"profile-{index}" in by_profile_id
+    }
+
+def analyze_job_profiles(job_description, profiles, force_refresh=False):
+    """Analyzes one job against several requirement profiles.
+
+    ``profiles`` maps profile name to requirements text. The job is compacted
+    once and scored against every profile that is neither pre-filtered nor
+    cached, several profiles per request. Profiles missing from a batched
+    response fall back to a single-job call. Returns {name: analysis}, each
+    with the same shape as analyze_job_content; results are cached per
+    profile, so a later single-profile analysis reuses them.
+    """
+    cache = get_analysis_cache()
+    prefilter = get_prefilter()
+    results = {}
+    pending = []
+    for name, requirements in profiles.items():
+        with span('prefilter'):
+            rejected = prefilter.check(job_description, requirements)
+        if rejected:
+            results[name] = rejected
+            continue
+        cached = None if force_refresh else cache.get(make_key(job_description, requirements, MODEL_NAME, PROMPT_VERSION))
+        if not force_refresh:
+            record_cache('analysis', bool(cached))
+        if cached:
+            results[name] = cached
+        else:
+            pending.append((name, requirements))
+
+    if len(pending) > 1:
+        with span('compact'):
+            job_text = compact_job_text(job_description, JOB_TOKEN_BUDGET)
+        for batch in _pack_profiles(job_text, pending):
+            if len(batch) == 1:
+                continue  # Handled by the single-job fallback below
+            try:
+                analyses = _analyze_profiles(job_text, batch)
+            except Exception as e:
+                print(f"Profile batch analysis failed, falling back to single-profile calls: {e}")
+                continue
+            for name, analysis in analyses.items():
+                cache.set(make_key(job_description, profiles[name], MODEL_NAME, PROMPT_VERSION), analysis)
+                results[name] = analysis
+
+    for name, requirements in pending:
+        if name not in results:
+            results[name] = _analyze_single(job_description, requirements, force_refresh=True)
+    return {name: results[name] for name in profiles}
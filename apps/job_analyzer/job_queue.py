@@ -0,0 +1,226 @@
+import json
+import time
+import uuid
+import random
+import sqlite3
+import threading
+from datetime import datetime
+
+
+class JobQueue:
+    """Persistent SQLite-backed queue of URLs drained by a pool of worker threads.
+
+    Items left running by a previous process are put back to pending on start,
+    and failed items are retried with exponential backoff up to max_attempts.
+    With a ``batch_handler`` and ``batch_size`` > 1, workers claim up to
+    batch_size items of the same job at once and process them together.
+    Jobs are drained oldest first; within a job, items go by priority (highest
+    first), then submission order. A job submitted with ``hold=True`` waits
+    until ``release`` assigns priorities (and may skip items).
+    """
+
+    def __init__(self, db_path, handler, workers=2, max_attempts=4, base_delay=30, is_retryable=None,
+                 batch_handler=None, batch_size=1):
+        self.db_path = db_path
+        self.handler = handler
+        self.batch_handler = batch_handler
+        self.batch_size = max(1, batch_size) if batch_handler else 1
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.is_retryable = is_retryable or (lambda result: True)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    created_at TEXT,
+                    options TEXT
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT,
+                    url TEXT,
+                    status TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    next_attempt_at REAL DEFAULT 0,
+                    result_id TEXT,
+                    rank TEXT,
+                    score INTEGER,
+                    error TEXT,
+                    updated_at TEXT,
+                    priority REAL DEFAULT 0
+                )
+            """)
+            columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(job_items)")]
+            if "priority" not in columns:
+                self._conn.execute("ALTER TABLE job_items ADD COLUMN priority REAL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_job_items_job ON job_items(job_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_job_items_status ON job_items(status, next_attempt_at)")
+
+    def start(self):
+        """Resumes unfinished items and starts the worker threads (idempotent)."""
+        with self._lock:
+            if self._threads:
+                return
+            with self._conn:
+                # Held items whose ranking was cut short are processed unranked
+                self._conn.execute("UPDATE job_items SET status = 'pending' WHERE status IN ('running', 'held')")
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"job-queue-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, urls, options=None, hold=False):
+        """Enqueues the URLs as one job and returns its id; held jobs wait for release()."""
+        job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, created_at, options) VALUES (?, ?, ?)",
+                (job_id, now, json.dumps(options or {}))
+            )
+            self._conn.executemany(
+                "INSERT INTO job_items (job_id, url, status, updated_at) VALUES (?, ?, ?, ?)",
+                [(job_id, url, "held" if hold else "pending", now) for url in urls]
+            )
+        with self._wakeup:
+            self._wakeup.notify_all()
+        return job_id
+
+    def held_items(self, job_id):
+        """Returns [(item id, url)] of a job's items still waiting for release()."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, url FROM job_items WHERE job_id = ? AND status = 'held' ORDER BY id", (job_id,)
+            ).fetchall()
+        return [(row["id"], row["url"]) for row in rows]
+
+    def release(self, job_id, priorities=None, skipped=()):
+        """Makes a held job's items claimable with the given {item id: priority}; skipped items are not run."""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE job_items SET priority = ?, updated_at = ? WHERE id = ? AND status = 'held'",
+                [(priority, now, item_id) for item_id, priority in (priorities or {}).items()]
+            )
+            self._conn.executemany(
+                "UPDATE job_items SET status = 'skipped', updated_at = ? WHERE id = ? AND status = 'held'",
+                [(now, item_id) for item_id in skipped]
+            )
+            self._conn.execute(
+                "UPDATE job_items SET status = 'pending', updated_at = ? WHERE job_id = ? AND status = 'held'",
+                (now, job_id)
+            )
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def status(self, job_id, include_items=True):
+        """Returns progress counts (and optionally per-item states) for a job, or None."""
+        with self._lock:
+            job = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+            items = []
+            if include_items:
+                items = [dict(row) for row in self._conn.execute(
+                    "SELECT url, status, attempts, result_id, rank, score, error, updated_at, priority "
+                    "FROM job_items WHERE job_id = ? ORDER BY id", (job_id,)
+                ).fetchall()]
+
+        total = sum(counts.values())
+        finished = counts.get("done", 0) + counts.get("failed", 0) + counts.get("skipped", 0)
+        result = {
+            "id": job["id"],
+            "created_at": job["created_at"],
+            "total": total,
+            "counts": counts,
+            "progress": round(finished / total, 3) if total else 1.0,
+            "status": "completed" if finished == total else "running"
+        }
+        if include_items:
+            result["items"] = items
+        return result
+
+    def list_jobs(self, limit=20):
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self.status(row["id"], include_items=False) for row in rows]
+
+    def _claim(self):
+        """Atomically marks the next due pending items (one job, up to batch_size) as running."""
+        with self._lock, self._conn:
+            now = time.time()
+            first = self._conn.execute(
+                "SELECT job_id FROM job_items WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if first is None:
+                return []
+            rows = self._conn.execute(
+                "SELECT job_items.id, job_items.url, job_items.attempts, jobs.options FROM job_items "
+                "JOIN jobs ON jobs.id = job_items.job_id "
+                "WHERE job_id = ? AND status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY job_items.priority DESC, job_items.id LIMIT ?",
+                (first["job_id"], now, self.batch_size)
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE job_items SET status = 'running', updated_at = ? WHERE id = ?",
+                [(datetime.now().isoformat(), row["id"]) for row in rows]
+            )
+            return rows
+
+    def _finish(self, item_id, **fields):
+        fields["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE job_items SET {assignments} WHERE id = ?", list(fields.values()) + [item_id])
+
+    def _worker_loop(self):
+        while True:
+            items = self._claim()
+            if not items:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=5)
+                continue
+
+            options = json.loads(items[0]["options"] or "{}")
+            urls = [item["url"] for item in items]
+            try:
+                if len(items) > 1:
+                    results = self.batch_handler(urls, **options)
+                else:
+                    results = [self.handler(urls[0], **options)]
+            except Exception as e:
+                results = [{"url": url, "status": "error", "message": str(e)} for url in urls]
+
+            for item, result in zip(items, results):
+                self._complete(item, result)
+
+    def _complete(self, item, result):
+        """Records a finished item as done, schedules a retry, or marks it failed."""
+        attempts = item["attempts"] + 1
+        if result.get("status") != "error":
+            self._finish(
+                item["id"], status="done", attempts=attempts, error=None,
+                result_id=result.get("id"), rank=result.get("rank"), score=result.get("score")
+            )
+        elif attempts < self.max_attempts and self.is_retryable(result):
+            # Exponential backoff with jitter so a flaky site is not hammered
+            delay = self.base_delay * (2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+            self._finish(
+                item["id"], status="pending", attempts=attempts,
+                next_attempt_at=time.time() + delay, error=result.get("message")
+            )
+        else:
+            self._finish(item["id"], status="failed", attempts=attempts, error=result.get("message"))
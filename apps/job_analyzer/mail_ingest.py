@@ -0,0 +1,369 @@
+"""Ingests recruiter emails from a local Maildir or mbox.
+
+Messages are read one at a time (an mbox is scanned line by line, a Maildir
+with os.scandir), so memory stays flat however large the mailbox is. From
+each message the job links and the body text are extracted; links and bodies
+already seen in earlier messages or runs are skipped. Progress is kept in a
+SQLite checkpoint (processed message ids, the byte offset reached in each
+mbox, seen links and body hashes), so later runs only handle new mail.
+
+Jobs are analyzed in-process and written as JSON lines (like main.py --batch),
+or, with --server, submitted to a running app: links to its /jobs queue and
+bodies to /analyze-text, so the results show up in its history.
+
+Usage:
+    python mail_ingest.py ~/Maildir/.Recruiters [--output mail_results.jsonl]
+    python mail_ingest.py ~/mail/recruiters.mbox --server http://localhost:5001
+"""
+import os
+import re
+import sys
+import json
+import html
+import email
+import hashlib
+import sqlite3
+import argparse
+from email.header import decode_header, make_header
+from urllib.parse import urlsplit
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from job_logic import fetch_text_from_url, extract_text_from_html, analyze_jobs_batch, BATCH_MAX_JOBS
+from analyzer_service import get_analyzer_service
+from fetch_cache import normalize_url
+
+DATA_DIR = os.getenv("JOB_ANALYZER_DATA_DIR") or os.path.join(os.path.dirname(__file__), 'logs')
+STATE_DB_PATH = os.path.join(DATA_DIR, 'mail_ingest.db')
+# Bodies shorter than this are covering notes around the links, not job descriptions
+MAIL_MIN_BODY_CHARS = int(os.getenv("MAIL_MIN_BODY_CHARS", "300"))
+# Newsletters can carry dozens of links; only the first ones are analyzed
+MAIL_MAX_LINKS = int(os.getenv("MAIL_MAX_LINKS", "10"))
+# Messages without jobs are checkpointed in rounds of this size, keeping memory flat
+ROUND_MESSAGES = 1000
+
+URL_PATTERN = re.compile(r"https?://[\w\-.~:/?#@!$&*+,;=%]+", re.ASCII)
+HREF_PATTERN = re.compile(r"""href\s*=\s*["']([^"']+)["']""", re.I)
+# Links that never lead to a job description
+IGNORED_LINK_PATTERN = re.compile(
+    r"unsubscribe|optout|opt-out|配信停止|mailmagazine|privacy|policy|/terms|/help|/faq|/login|/signin|"
+    r"/mypage|/settings|\.(png|jpe?g|gif|svg|ico|css|js)(\?|$)",
+    re.I
+)
+
+
+class MailCheckpoint:
+    """SQLite record of what earlier runs already ingested."""
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS messages (key TEXT PRIMARY KEY, processed_at TEXT)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS links (url TEXT PRIMARY KEY, message_id TEXT)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS bodies (hash TEXT PRIMARY KEY, message_id TEXT)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS mbox_offsets (path TEXT PRIMARY KEY, offset INTEGER)")
+
+    def _exists(self, table, column, value):
+        return self._conn.execute(f"SELECT 1 FROM {table} WHERE {column} = ?", (value,)).fetchone() is not None
+
+    def has_message(self, key):
+        return self._exists("messages", "key", key)
+
+    def has_link(self, url):
+        return self._exists("links", "url", url)
+
+    def has_body(self, digest):
+        return self._exists("bodies", "hash", digest)
+
+    def mbox_offset(self, path):
+        row = self._conn.execute("SELECT offset FROM mbox_offsets WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else 0
+
+    def commit(self, messages, links, bodies, mbox=None):
+        """Records one round: message keys, (url, message id) and (hash, message id) pairs, and (path, offset)."""
+        now = datetime.now().isoformat()
+        with self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO messages (key, processed_at) VALUES (?, ?)",
+                                   [(key, now) for key in messages])
+            self._conn.executemany("INSERT OR IGNORE INTO links (url, message_id) VALUES (?, ?)", links)
+            self._conn.executemany("INSERT OR IGNORE INTO bodies (hash, message_id) VALUES (?, ?)", bodies)
+            if mbox:
+                self._conn.execute("INSERT OR REPLACE INTO mbox_offsets (path, offset) VALUES (?, ?)", mbox)
+
+
+def _iter_mbox(path, start):
+    """Yields (raw message bytes, end offset) from an mbox, starting at byte offset ``start``."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        lines = []
+        offset = start
+        previous_blank = True
+        for line in f:
+            if line.startswith(b'From ') and previous_blank and lines:
+                yield b''.join(lines[1:]), offset
+                lines = []
+            lines.append(line)
+            offset += len(line)
+            previous_blank = not line.strip()
+        if lines:
+            yield b''.join(lines[1:] if lines[0].startswith(b'From ') else lines), offset
+
+
+def iter_messages(path, checkpoint):
+    """Yields (keys, raw bytes, mbox offset or None) for every message not ingested before.
+
+    ``keys`` identify the message in the checkpoint: the Message-ID (or a hash
+    of the raw message), plus the file name for Maildir messages so those are
+    skipped without being read again.
+    """
+    if os.path.isdir(path):
+        for folder in ('new', 'cur'):
+            directory = os.path.join(path, folder)
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # Flags after ':' change when a message is read; the unique name before it does not
+                    file_key = "maildir:" + entry.name.split(':', 1)[0]
+                    if not entry.is_file() or checkpoint.has_message(file_key):
+                        continue
+                    with open(entry.path, 'rb') as f:
+                        raw = f.read()
+                    yield [file_key, _message_key(raw)], raw, None
+        return
+
+    start = checkpoint.mbox_offset(path)
+    if start:
+        # The mbox was rewritten (e.g. compacted) if the checkpoint no longer points at a message
+        with open(path, 'rb') as f:
+            f.seek(start)
+            if start > os.path.getsize(path) or f.read(5) not in (b'From ', b''):
+                start = 0
+    for raw, offset in _iter_mbox(path, start):
+        yield [_message_key(raw)], raw, offset
+
+
+def _decode_header(value):
+    try:
+        return str(make_header(decode_header(value))).strip()
+    except (LookupError, UnicodeError, ValueError):
+        return str(value).strip()
+
+
+def _message_key(raw):
+    match = re.search(rb"^Message-ID:\s*(<[^>\r\n]+>)", raw[:65536], re.I | re.M)
+    if match:
+        return "id:" + match.group(1).decode('ascii', 'replace')
+    return "sha256:" + hashlib.sha256(raw).hexdigest()
+
+
+def extract_job_content(message):
+    """Returns (body text, links) of a parsed message; HTML parts are used when there is no plain text."""
+    plain = []
+    html_parts = []
+    for part in message.walk():
+        if part.is_multipart() or part.get_content_disposition() == 'attachment':
+            continue
+        content_type = part.get_content_type()
+        if content_type not in ('text/plain', 'text/html'):
+            continue
+        payload = part.get_payload(decode=True) or b''
+        try:
+            content = payload.decode(part.get_content_charset() or 'utf-8', 'replace')
+        except LookupError:
+            content = payload.decode('utf-8', 'replace')
+        (plain if content_type == 'text/plain' else html_parts).append(content)
+
+    links = []
+    for text in plain:
+        links.extend(url.rstrip('.,;:!?') for url in URL_PATTERN.findall(text))
+    for document in html_parts:
+        links.extend(html.unescape(href) for href in HREF_PATTERN.findall(document))
+
+    if plain:
+        body = "\n".join(plain)
+    else:
+        body = "\n".join(extract_text_from_html(document.encode('utf-8')) for document in html_parts)
+    return body.strip(), links
+
+
+def collect_items(raw, checkpoint, seen_links, seen_bodies, link_pattern=None):
+    """Parses one message into job items ({"url"} or {"text"}), skipping links and bodies seen before.
+
+    Returns (items, new links, new body hashes); ``seen_links`` and
+    ``seen_bodies`` hold what the current round already queued.
+    """
+    # compat32 parsing with explicit decoding is several times faster than policy.default
+    message = email.message_from_bytes(raw)
+    message_id = str(message.get('Message-ID', '')).strip()
+    subject = _decode_header(message.get('Subject', ''))
+    body, links = extract_job_content(message)
+
+    items = []
+    new_links = []
+    for link in links:
+        if len(new_links) >= MAIL_MAX_LINKS:
+            break
+        if IGNORED_LINK_PATTERN.search(link) or (link_pattern and not link_pattern.search(link)):
+            continue
+        # mailto:, tel:, "#top" and relative paths have no page to fetch (mails carry no base URL)
+        parts = urlsplit(link.strip())
+        if parts.scheme.lower() not in ('http', 'https') or not parts.netloc:
+            continue
+        url = normalize_url(link)
+        if url in seen_links or checkpoint.has_link(url):
+            continue
+        seen_links.add(url)
+        new_links.append((url, message_id))
+        items.append({"message_id": message_id, "subject": subject, "url": url})
+
+    new_bodies = []
+    if len(body) >= MAIL_MIN_BODY_CHARS:
+        digest = hashlib.sha256(re.sub(r"\s+", " ", body).encode('utf-8')).hexdigest()
+        if digest not in seen_bodies and not checkpoint.has_body(digest):
+            seen_bodies.add(digest)
+            new_bodies.append((digest, message_id))
+            items.append({"message_id": message_id, "subject": subject, "url": None, "text": body})
+    return items, new_links, new_bodies
+
+
+def analyze_items(items, requirements, workers):
+    """Fetches linked pages and analyzes all items with batched requests; returns JSONL records."""
+    def fetch(item):
+        return item.get("text") or fetch_text_from_url(item["url"])
+
+    def analyze(chunk):
+        try:
+            return analyze_jobs_batch([text for _, text in chunk], requirements)
+        except Exception as e:
+            return [{"error": f"Error analyzing job: {e}"}] * len(chunk)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        texts = list(executor.map(fetch, items))
+        jobs = [(item, text) for item, text in zip(items, texts) if not text.startswith("Error")]
+        chunks = [jobs[i:i + BATCH_MAX_JOBS] for i in range(0, len(jobs), BATCH_MAX_JOBS)]
+        analyses = executor.map(analyze, chunks)
+        analyzed = {id(item): analysis for chunk, results in zip(chunks, analyses)
+                    for (item, _), analysis in zip(chunk, results)}
+
+    timestamp = datetime.now().isoformat()
+    records = []
+    for item, text in zip(items, texts):
+        record = {"message_id": item["message_id"], "subject": item["subject"],
+                  "source": "link" if item["url"] else "body", "url": item["url"], "timestamp": timestamp}
+        analysis = analyzed.get(id(item), {"error": text})
+        if "error" in analysis:
+            record.update(status="error", message=analysis["error"])
+        else:
+            record.update(status="success", rank=analysis["rank"], score=analysis["score"], analysis=analysis)
+        records.append(record)
+    return records
+
+
+def submit_items(items, server, workers):
+    """Queues links as one /jobs job and analyzes bodies via /analyze-text on a running app."""
+    import requests
+    urls = [item["url"] for item in items if item["url"]]
+    if urls:
+        response = requests.post(f"{server}/jobs", json={"urls": urls}, timeout=60)
+        response.raise_for_status()
+        print(f"Queued {len(urls)} link(s) as job {response.json()['id']}.")
+
+    def analyze_text(item):
+        response = requests.post(f"{server}/analyze-text", json={"text": item["text"]}, timeout=600)
+        result = response.json()
+        print(f"{item['subject'][:40]}: {result.get('rank') or result.get('message') or result.get('error')}")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(analyze_text, [item for item in items if not item["url"]]))
+
+
+def ingest(path, checkpoint, handle_round, round_items=BATCH_MAX_JOBS * 4, link_pattern=None):
+    """Streams new messages from ``path`` and hands their items to handle_round in bounded rounds.
+
+    A round is checkpointed only after handle_round returns, so an interrupted
+    run picks up again at the first unfinished round.
+    """
+    counts = {"messages": 0, "items": 0}
+    state = {"items": [], "messages": set(), "links": [], "bodies": [], "offset": None,
+             "seen_links": set(), "seen_bodies": set()}
+
+    def flush():
+        if state["items"]:
+            handle_round(state["items"])
+        mbox = (path, state["offset"]) if state["offset"] is not None else None
+        checkpoint.commit(state["messages"], state["links"], state["bodies"], mbox)
+        counts["items"] += len(state["items"])
+        state.update(items=[], messages=set(), links=[], bodies=[], seen_links=set(), seen_bodies=set())
+
+    for keys, raw, offset in iter_messages(path, checkpoint):
+        # The same message can sit in several folders or appear twice in an mbox
+        if not any(key in state["messages"] or checkpoint.has_message(key) for key in keys):
+            counts["messages"] += 1
+            try:
+                items, links, bodies = collect_items(raw, checkpoint, state["seen_links"], state["seen_bodies"],
+                                                     link_pattern)
+            except Exception as e:
+                print(f"Skipping unparsable message {keys[-1]}: {e}")
+                items, links, bodies = [], [], []
+            state["items"].extend(items)
+            state["links"].extend(links)
+            state["bodies"].extend(bodies)
+        state["messages"].update(keys)
+        state["offset"] = offset
+        if len(state["items"]) >= round_items or len(state["messages"]) >= ROUND_MESSAGES:
+            flush()
+    flush()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyze the job links and descriptions in recruiter emails.')
+    parser.add_argument('mailbox', help='Maildir directory (with cur/ and new/) or mbox file')
+    parser.add_argument('--output', default='mail_results.jsonl', help='JSONL file for results (default: mail_results.jsonl)')
+    parser.add_argument('--server', help='Submit to a running app (e.g. http://localhost:5001) instead of analyzing here')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent page fetches / batched requests (default: 4)')
+    parser.add_argument('--link-pattern', help='Only follow links matching this regular expression (e.g. a job site domain)')
+    parser.add_argument('--state', default=STATE_DB_PATH, help='Checkpoint database (default: logs/mail_ingest.db)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.mailbox):
+        print(f"Error: Mailbox not found: {args.mailbox}")
+        sys.exit(1)
+    if not args.server and not os.getenv("GEMINI_API_KEY"):
+        print("Error: GEMINI_API_KEY not found in environment variables.")
+        print("Please set your API key in the .env file, or use --server.")
+        sys.exit(1)
+
+    workers = max(1, args.workers)
+    link_pattern = re.compile(args.link_pattern) if args.link_pattern else None
+    checkpoint = MailCheckpoint(args.state)
+
+    if args.server:
+        server = args.server.rstrip('/')
+
+        def handle_round(items):
+            submit_items(items, server, workers)
+    else:
+        requirements = get_analyzer_service().get_requirements()
+
+        def handle_round(items):
+            records = analyze_items(items, requirements, workers)
+            with open(args.output, 'a', encoding='utf-8') as out:
+                for record in records:
+                    out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    print(f"{(record['url'] or record['subject'])[:60]}: {record.get('rank') or record.get('message')}")
+
+    counts = ingest(os.path.abspath(args.mailbox), checkpoint, handle_round,
+                    round_items=BATCH_MAX_JOBS * workers, link_pattern=link_pattern)
+    print(f"Done: {counts['messages']} new message(s), {counts['items']} job(s) "
+          + (f"submitted to {args.server}." if args.server else f"analyzed. Results in {args.output}"))
+
+
+if __name__ == "__main__":
+    main()
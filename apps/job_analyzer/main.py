@@ -1,8 +1,16 @@
 import os
-import argparse
 import sys
-import google.generativeai as genai
+import glob
+import json
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
+from job_logic import analyze_job_content, analyze_jobs_batch, analyze_job_profiles, BATCH_MAX_JOBS
+from analysis_schema import render_markdown
+from analyzer_service import get_analyzer_service
+from prefilter import get_prefilter
+from prerank import ngram_counts, rank_counts, top_k_order
 
 # Load environment variables
 load_dotenv()
@@ -16,82 +24,223 @@ def load_file(filepath):
         print(f"Error: File not found: {filepath}")
         sys.exit(1)
 
-def analyze_job(job_description, requirements):
+def format_result(analysis):
+    """Formats an analysis (or its error) for terminal output."""
+    if "error" in analysis:
+        return analysis["error"]
+    return render_markdown(analysis)
+
+def print_prefilter_stats():
+    stats = get_prefilter().stats()
+    if stats["rejected"]:
+        print(f"\nPre-filter: {stats['rejected']}/{stats['checked']} job(s) rejected without calling Gemini (skip rate {stats['skip_rate']:.0%})")
+
+def analyze_job(job_description, requirements, use_cache=True):
     """Analyzes the job description against requirements using Gemini."""
-    
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        print("Error: GEMINI_API_KEY not found in environment variables.")
-        print("Please set your API key in the .env file.")
-        sys.exit(1)
+    return format_result(analyze_job_content(job_description, requirements, force_refresh=not use_cache))
 
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.0-flash')
-
-    prompt = f"""
-    あなたは優秀なキャリアアドバイザーです。
-    以下の「求人情報」とユーザーの「希望条件」を比較し、この求人がユーザーにおすすめできるかどうかを判定してください。
-
-    ## 希望条件
-    {requirements}
-
-    ## 求人情報
-    {job_description}
-
-    ## 出力フォーマット
-    以下の形式で出力してください。
-
-    ---
-    **総合判定**: [S/A/B/C] (Sが最高、Cが最低)
-    **推奨理由**:
-    - (理由1)
-    - (理由2)
-    **懸念点**:
-    - (懸念点1)
-    - (懸念点2)
-    **詳細分析**:
-    (各希望条件に対する適合度を簡単に解説)
-    ---
-    """
+def collect_inputs(pattern):
+    """Expands a directory (its *.txt files) or a glob pattern into a sorted list of files."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.txt')
+    return sorted(os.path.abspath(path) for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+def load_completed(output_path):
+    """Returns the files that already have a successful result line in the output."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Line cut short by an interrupted run
+            if record.get("status") == "success":
+                completed.add(record.get("file"))
+    return completed
+
+def analyze_files(paths, requirements, use_cache=True):
+    """Analyzes a chunk of files in one batched call; returns one JSONL record per file."""
+    records = []
+    texts = []
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                texts.append((path, f.read()))
+        except (OSError, UnicodeDecodeError) as e:
+            records.append({"file": path, "status": "error", "message": f"Could not read file: {e}"})
 
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        analyses = analyze_jobs_batch([text for _, text in texts], requirements, force_refresh=not use_cache)
     except Exception as e:
-        return f"Error analyzing job: {e}"
+        analyses = [{"error": f"Error analyzing job: {e}"}] * len(texts)
+
+    timestamp = datetime.now().isoformat()
+    for (path, _), analysis in zip(texts, analyses):
+        if "error" in analysis:
+            records.append({"file": path, "status": "error", "message": analysis["error"], "timestamp": timestamp})
+        else:
+            records.append({
+                "file": path,
+                "status": "success",
+                "rank": analysis["rank"],
+                "score": analysis["score"],
+                "analysis": analysis,
+                "timestamp": timestamp
+            })
+    return records
+
+def prerank_files(paths, requirements, top_k=0):
+    """Orders files by TF-IDF similarity to the requirements (best first), keeping the top_k when > 0.
+
+    Each file is reduced to hashed n-gram counts as it is read, so the texts
+    themselves are not held in memory.
+    """
+    vectors = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            vectors.append(ngram_counts(f.read()))
+    scores = rank_counts(vectors, [requirements])
+    return [paths[index] for index in top_k_order(scores, top_k)]
+
+def run_batch(pattern, output_path, requirements, workers=4, use_cache=True, prerank=False, top_k=0):
+    """Analyzes every file matching ``pattern`` and appends one JSON line per result.
+
+    Files already recorded as successful in ``output_path`` are skipped, so an
+    interrupted run continues where it stopped. Files are read in chunks of
+    BATCH_MAX_JOBS and at most ``workers * 2`` chunks are in flight, which
+    keeps memory flat regardless of how many files match. With ``prerank``
+    (or ``top_k``), the most similar files to the requirements go first.
+    """
+    paths = collect_inputs(pattern)
+    completed = load_completed(output_path)
+    todo = [path for path in paths if path not in completed]
+    print(f"Found {len(paths)} file(s); {len(paths) - len(todo)} already in {output_path}, {len(todo)} to analyze.")
+    if todo and (prerank or top_k):
+        ranked = prerank_files(todo, requirements, top_k)
+        print(f"Pre-ranked {len(todo)} file(s) by similarity to the requirements"
+              + (f"; analyzing the top {len(ranked)}." if len(ranked) < len(todo) else "."))
+        todo = ranked
+    if not todo:
+        return
+
+    # Terminate a line left unfinished by an interrupted run before appending
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        with open(output_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+    else:
+        needs_newline = False
+
+    counts = {"success": 0, "error": 0}
+
+    def write_records(futures, out):
+        for future in futures:
+            for record in future.result():
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                counts[record["status"]] += 1
+                label = record.get("rank") or record.get("message")
+                print(f"[{counts['success'] + counts['error']}/{len(todo)}] {record['file']}: {label}")
+        out.flush()
+
+    chunks = (todo[i:i + BATCH_MAX_JOBS] for i in range(0, len(todo), BATCH_MAX_JOBS))
+    with open(output_path, 'a', encoding='utf-8') as out, ThreadPoolExecutor(max_workers=workers) as executor:
+        if needs_newline:
+            out.write('\n')
+        pending = set()
+        while True:
+            for chunk in chunks:
+                pending.add(executor.submit(analyze_files, chunk, requirements, use_cache))
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                break
+            # Every finished chunk is written right away, so an interrupted run loses none of them
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            write_records(done, out)
+
+    print(f"Done: {counts['success']} succeeded, {counts['error']} failed. Results in {output_path}")
 
 def main():
     parser = argparse.ArgumentParser(description='Analyze job offers based on your requirements.')
-    parser.add_argument('input', help='Path to the job description file (text format)')
-    
+    parser.add_argument('input', nargs='*', help='Path(s) to job description files (text format); several files are analyzed in batched requests')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore cached analyses and call Gemini again')
+    parser.add_argument('--batch', metavar='DIR_OR_GLOB', help='Analyze every job file in a directory (*.txt) or matching a glob, writing JSON lines to --output')
+    parser.add_argument('--output', default='results.jsonl', help='JSONL file for --batch results; files already in it are skipped (default: results.jsonl)')
+    parser.add_argument('--workers', type=int, default=4, help='Number of concurrent batched requests in --batch mode (default: 4)')
+    parser.add_argument('--prerank', action='store_true', help='In --batch mode, analyze the files most similar to the requirements first')
+    parser.add_argument('--top-k', type=int, default=0, help='In --batch mode, only analyze the K files most similar to the requirements (implies --prerank)')
+    parser.add_argument('--profiles', help='Comma-separated requirement profiles to score each job against (e.g. default,remote)')
+
     args = parser.parse_args()
-    
+    if not args.input and not args.batch:
+        parser.error("give job file(s) or --batch DIR_OR_GLOB")
+    if args.profiles and args.batch:
+        parser.error("--profiles cannot be combined with --batch")
+
+    if not os.getenv("GEMINI_API_KEY"):
+        print("Error: GEMINI_API_KEY not found in environment variables.")
+        print("Please set your API key in the .env file.")
+        sys.exit(1)
+
     # 1. Load User Requirements
     # Assumes requirements.md is in the same directory as this script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    requirements_path = os.path.join(script_dir, "requirements.md")
-    
-    if not os.path.exists(requirements_path):
+    service = get_analyzer_service()
+    if not os.path.exists(service.requirements_path):
         print("Error: requirements.md not found.")
         print("Please create requirements.md with your job preferences.")
         sys.exit(1)
-        
-    requirements = load_file(requirements_path)
+
+    if args.profiles:
+        profiles = [name.strip() for name in args.profiles.split(',') if name.strip()]
+        unknown = [name for name in profiles if not service.has_profile(name)]
+        if unknown:
+            print(f"Error: Unknown profile(s): {', '.join(unknown)} (available: {', '.join(service.list_profiles())})")
+            sys.exit(1)
+        requirements_by_profile = {name: service.get_requirements(name) for name in profiles}
+        print(f"Loaded {len(profiles)} requirement profile(s).")
+        for path in args.input:
+            analyses = analyze_job_profiles(load_file(path), requirements_by_profile, force_refresh=args.no_cache)
+            for name, analysis in analyses.items():
+                print("\n" + "="*30)
+                print("       ANALYSIS RESULT       ")
+                print(f"  {path} [{name}]")
+                print("="*30 + "\n")
+                print(format_result(analysis))
+        print_prefilter_stats()
+        return
+
+    requirements = service.get_requirements()
     print("Loaded requirements.")
 
-    # 2. Load Job Description
-    job_description = load_file(args.input)
-    print(f"Loaded job description from {args.input}.")
+    if args.batch:
+        run_batch(args.batch, args.output, requirements, workers=max(1, args.workers), use_cache=not args.no_cache,
+                  prerank=args.prerank, top_k=max(0, args.top_k))
+        print_prefilter_stats()
+        return
+
+    # 2. Load Job Descriptions
+    job_descriptions = [load_file(path) for path in args.input]
+    print(f"Loaded {len(job_descriptions)} job description(s).")
 
     # 3. Analyze
     print("Analyzing job offer...")
-    result = analyze_job(job_description, requirements)
-    
+    if len(job_descriptions) == 1:
+        results = [analyze_job(job_descriptions[0], requirements, use_cache=not args.no_cache)]
+    else:
+        analyses = analyze_jobs_batch(job_descriptions, requirements, force_refresh=args.no_cache)
+        results = [format_result(analysis) for analysis in analyses]
+
     # 4. Output Result
-    print("\n" + "="*30)
-    print("       ANALYSIS RESULT       ")
-    print("="*30 + "\n")
-    print(result)
+    for path, result in zip(args.input, results):
+        print("\n" + "="*30)
+        print("       ANALYSIS RESULT       ")
+        print(f"  {path}")
+        print("="*30 + "\n")
+        print(result)
+
+    print_prefilter_stats()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,149 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Stage latencies range from a few ms (cache hits, extraction) to a minute (browser + LLM)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+_local = threading.local()
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Process-wide stage histograms, labelled counters and the in-flight gauge."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_seconds = {}
+        self.counters = {}
+        self.gauges = {}
+        self.inflight = 0
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.stage_seconds.get(stage)
+            if histogram is None:
+                histogram = self.stage_seconds[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def add_inflight(self, delta):
+        with self._lock:
+            self.inflight += delta
+
+    def render_prometheus(self):
+        """Renders all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                "# HELP job_analyzer_stage_seconds Time spent per pipeline stage.",
+                "# TYPE job_analyzer_stage_seconds histogram",
+            ]
+            for stage, histogram in sorted(self.stage_seconds.items()):
+                label = f'stage="{_escape(stage)}"'
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'job_analyzer_stage_seconds_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'job_analyzer_stage_seconds_bucket{{{label},le="+Inf"}} {histogram.count}')
+                lines.append(f'job_analyzer_stage_seconds_sum{{{label}}} {histogram.sum:.6f}')
+                lines.append(f'job_analyzer_stage_seconds_count{{{label}}} {histogram.count}')
+
+            counter_names = sorted({name for name, _ in self.counters})
+            for name in counter_names:
+                lines.append(f"# TYPE {name} counter")
+                for (counter_name, labels), value in sorted(self.counters.items()):
+                    if counter_name != name:
+                        continue
+                    label_str = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels)
+                    lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+
+            lines.append("# HELP job_analyzer_inflight_requests Analyses currently being processed.")
+            lines.append("# TYPE job_analyzer_inflight_requests gauge")
+            lines.append(f"job_analyzer_inflight_requests {self.inflight}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+metrics = Metrics()
+
+
+# --- Per-request traces ---
+# A trace is a dict of stage -> milliseconds for the request running on this thread.
+
+def start_trace():
+    _local.trace = {}
+    return _local.trace
+
+def current_trace():
+    return getattr(_local, 'trace', None)
+
+def finish_trace():
+    trace = current_trace() or {}
+    _local.trace = None
+    return trace
+
+@contextmanager
+def attach_trace(trace):
+    """Makes spans on this thread (e.g. a browser worker) count towards another thread's trace."""
+    previous = current_trace()
+    _local.trace = trace
+    try:
+        yield
+    finally:
+        _local.trace = previous
+
+@contextmanager
+def span(stage):
+    """Times a pipeline stage into the global histogram and the current trace."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe(stage, elapsed)
+        trace = current_trace()
+        if trace is not None:
+            trace[stage] = round(trace.get(stage, 0) + elapsed * 1000, 1)
+
+@contextmanager
+def track_inflight():
+    metrics.add_inflight(1)
+    try:
+        yield
+    finally:
+        metrics.add_inflight(-1)
+
+def record_cache(cache_name, hit):
+    metrics.inc("job_analyzer_cache_hits_total" if hit else "job_analyzer_cache_misses_total", cache=cache_name)
+
+def record_error(domain):
+    metrics.inc("job_analyzer_errors_total", domain=domain or "unknown")
@@ -0,0 +1,230 @@
+import os
+import re
+import threading
+from functools import lru_cache
+
+from metrics import metrics
+
+PREFECTURES = [
+    "北海道", "青森県", "岩手県", "宮城県", "秋田県", "山形県", "福島県", "茨城県", "栃木県", "群馬県",
+    "埼玉県", "千葉県", "東京都", "神奈川県", "新潟県", "富山県", "石川県", "福井県", "山梨県", "長野県",
+    "岐阜県", "静岡県", "愛知県", "三重県", "滋賀県", "京都府", "大阪府", "兵庫県", "奈良県", "和歌山県",
+    "鳥取県", "島根県", "岡山県", "広島県", "山口県", "徳島県", "香川県", "愛媛県", "高知県", "福岡県",
+    "佐賀県", "長崎県", "熊本県", "大分県", "宮崎県", "鹿児島県", "沖縄県",
+]
+# "東京" / "大阪" etc. without the suffix; "23区" implies Tokyo
+PREFECTURE_ALIASES = dict(
+    {name: name for name in PREFECTURES},
+    **{name[:-1]: name for name in PREFECTURES if name != "北海道"},
+    **{"23区": "東京都"}
+)
+# Full names come first so "東京都" is never read as "京都"
+PREFECTURE_PATTERN = re.compile("|".join(sorted(PREFECTURE_ALIASES, key=lambda name: -len(name))))
+
+SALARY_PATTERN = re.compile(
+    r"(?P<kind>年収|年俸|月給|月収|基本給)(?P<gap>[^\d\n]{0,10}?)"
+    r"(?P<low>\d[\d,]*(?:\.\d+)?)\s*(?P<low_man>万)?円?"
+    r"(?:\s*(?P<tilde>[〜~～\-－])\s*(?:(?P<high>\d[\d,]*(?:\.\d+)?)\s*(?P<high_man>万)?円?)?)?"
+    r"(?P<at_least>\s*以上)?"
+)
+# "年収例" / "平均年収" / "モデル年収" describe someone else's pay, not the offer's range
+SALARY_EXAMPLE_PATTERN = re.compile(r"例|平均|モデル|実績")
+# Pay with no ceiling; the upper bound in the text is not the real maximum
+UNCAPPED_PAY_PATTERN = re.compile(r"インセンティブ|歩合|青天井|上限なし")
+MONTHS_PER_YEAR_MAX = 16  # 12 months plus up to 4 months' bonus
+
+REMOTE_PATTERN = re.compile(r"リモート|在宅|テレワーク")
+ONSITE_ONLY_PATTERN = re.compile(
+    r"(リモート|在宅|テレワーク)(ワーク|勤務)?(は|の)?(不可|なし|無し|でき(ません|ない)|対象外)|"
+    r"出社必須|フル出社|完全出社|毎日出社"
+)
+FULL_REMOTE_PATTERN = re.compile(r"フルリモート|完全リモート|完全在宅|フル在宅|リモート\s*100\s*[%％]|出社不要|出社なし")
+LOCATION_HEADING_PATTERN = re.compile(r"勤務地|勤務場所|就業場所|勤務先")
+HEADING_PATTERN = re.compile(r"^[【■●◆▼\[#]")
+LOCATION_SECTION_LINES = 4
+
+MUST_HAVE_SECTION_PATTERN = re.compile(r"^#+.*(基本条件|必須条件|Must)", re.IGNORECASE)
+
+PREFILTER_SCORE = 10
+
+
+def _to_man_yen(number, has_man):
+    """Converts a matched amount to units of 10,000 yen; None when the unit is unclear."""
+    value = float(number.replace(',', ''))
+    if has_man:
+        return value
+    if value >= 10000:
+        return value / 10000
+    return None
+
+
+@lru_cache(maxsize=8)
+def parse_hard_constraints(requirements):
+    """Reads the must-have section of requirements.md into checkable constraints.
+
+    Only the "基本条件 (Must Haves)" section is used; anything that cannot be
+    parsed is left unconstrained so the LLM still judges it.
+    """
+    constraints = {"min_salary": None, "prefectures": set(), "allow_full_remote": False, "remote_required": False}
+    in_must_haves = False
+    for raw in requirements.splitlines():
+        line = raw.strip()
+        if line.startswith('#'):
+            in_must_haves = bool(MUST_HAVE_SECTION_PATTERN.match(line))
+            continue
+        if not in_must_haves or not line:
+            continue
+
+        if re.search(r"年収|年俸", line):
+            match = re.search(r"(\d[\d,]*(?:\.\d+)?)\s*万", line)
+            if match:
+                constraints["min_salary"] = float(match.group(1).replace(',', ''))
+        elif "勤務地" in line:
+            if "全国" not in line:
+                constraints["prefectures"] = {PREFECTURE_ALIASES[name] for name in PREFECTURE_PATTERN.findall(line)}
+            constraints["allow_full_remote"] = bool(FULL_REMOTE_PATTERN.search(line))
+        elif REMOTE_PATTERN.search(line):
+            constraints["remote_required"] = bool(re.search(r"必須|週\s*\d\s*日以上", line))
+    return constraints
+
+
+def extract_salary_ceiling(text):
+    """Highest annual salary (万円) the job text allows, or None if unknown or uncapped."""
+    if UNCAPPED_PAY_PATTERN.search(text):
+        return None
+    ceiling = None
+    for match in SALARY_PATTERN.finditer(text):
+        if SALARY_EXAMPLE_PATTERN.search(match.group('gap') + text[max(0, match.start() - 3):match.start()]):
+            continue
+        if match.group('high'):
+            upper = _to_man_yen(match.group('high'), match.group('high_man') or match.group('low_man'))
+        elif match.group('tilde') or match.group('at_least'):
+            return None  # Open-ended ("500万円〜", "以上")
+        else:
+            upper = _to_man_yen(match.group('low'), match.group('low_man'))
+        if upper is None:
+            continue
+        if match.group('kind') in ("月給", "月収", "基本給"):
+            upper *= MONTHS_PER_YEAR_MAX
+        ceiling = upper if ceiling is None else max(ceiling, upper)
+    return ceiling
+
+
+def extract_prefectures(text):
+    """Prefectures named under the job's location heading."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    found = set()
+    for i, line in enumerate(lines):
+        if not LOCATION_HEADING_PATTERN.search(line[:20]):
+            continue
+        section = [line]
+        for following in lines[i + 1:i + 1 + LOCATION_SECTION_LINES]:
+            if HEADING_PATTERN.match(following):
+                break
+            section.append(following)
+        for name in PREFECTURE_PATTERN.findall("\n".join(section)):
+            found.add(PREFECTURE_ALIASES[name])
+    return found
+
+
+def extract_remote_policy(text):
+    """Returns "full", "onsite" (explicitly no remote work) or None when unclear."""
+    if FULL_REMOTE_PATTERN.search(text):
+        return "full"
+    if ONSITE_ONLY_PATTERN.search(text) and not REMOTE_PATTERN.search(ONSITE_ONLY_PATTERN.sub("", text)):
+        return "onsite"
+    return None
+
+
+def key_facts(text):
+    """Salary figures, prefectures and remote policy of a job text.
+
+    Two postings that differ here are different offers, however similar the
+    rest of the text is.
+    """
+    salaries = tuple(sorted(re.sub(r"\s+", "", match.group(0)) for match in SALARY_PATTERN.finditer(text)))
+    return salaries, frozenset(extract_prefectures(text)), extract_remote_policy(text)
+
+
+def find_violations(job_text, constraints):
+    """Returns [(criterion, explanation)] for hard constraints the job clearly fails."""
+    violations = []
+    remote_policy = extract_remote_policy(job_text)
+
+    min_salary = constraints["min_salary"]
+    if min_salary is not None:
+        ceiling = extract_salary_ceiling(job_text)
+        if ceiling is not None and ceiling < min_salary:
+            violations.append(("年収", f"給与の上限 (年収換算 約{ceiling:.0f}万円) が希望の最低年収 {min_salary:.0f}万円を下回っています"))
+
+    if constraints["prefectures"] and not (constraints["allow_full_remote"] and remote_policy == "full"):
+        prefectures = extract_prefectures(job_text)
+        if prefectures and not prefectures & constraints["prefectures"]:
+            violations.append((
+                "勤務地",
+                f"勤務地 ({'・'.join(sorted(prefectures))}) が希望の勤務地 ({'・'.join(sorted(constraints['prefectures']))}) に含まれません"
+            ))
+
+    if constraints["remote_required"] and remote_policy == "onsite":
+        violations.append(("リモートワーク", "リモートワーク不可 (出社のみ) の求人です"))
+    return violations
+
+
+class PreFilter:
+    """Local pre-screen that answers C for jobs which clearly fail a must-have.
+
+    Only explicit mismatches are rejected (a salary ceiling below the floor, a
+    location outside the allowed prefectures, onsite-only when remote work is
+    required); anything ambiguous goes on to the LLM.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.rejected = 0
+
+    def rejects(self, job_text, requirements):
+        """Whether check() would reject the job, without counting it."""
+        return self.enabled and bool(find_violations(job_text, parse_hard_constraints(requirements)))
+
+    def check(self, job_text, requirements):
+        """Returns a rank-C analysis if the job fails a hard constraint, otherwise None."""
+        if not self.enabled:
+            return None
+        violations = find_violations(job_text, parse_hard_constraints(requirements))
+        with self._lock:
+            self.checked += 1
+            if violations:
+                self.rejected += 1
+        metrics.inc("job_analyzer_prefilter_total", result="rejected" if violations else "passed")
+        if not violations:
+            return None
+        return {
+            "rank": "C",
+            "score": PREFILTER_SCORE,
+            "reasons": [],
+            "concerns": ["必須条件を満たしていないため、AIによる詳細分析を省略しました"] + [text for _, text in violations],
+            "criteria": [{"name": name, "match": "不適合", "comment": text} for name, text in violations],
+            "prefiltered": True
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "checked": self.checked,
+                "rejected": self.rejected,
+                "skip_rate": round(self.rejected / self.checked, 3) if self.checked else 0.0
+            }
+
+
+_prefilter = None
+_prefilter_lock = threading.Lock()
+
+def get_prefilter():
+    """Returns the process-wide pre-filter, creating it on first use."""
+    global _prefilter
+    with _prefilter_lock:
+        if _prefilter is None:
+            _prefilter = PreFilter(enabled=os.getenv("PREFILTER_ENABLED", "1") != "0")
+        return _prefilter
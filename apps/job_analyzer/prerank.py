@@ -0,0 +1,88 @@
+import os
+import re
+import numpy as np
+
+# Character n-grams suit Japanese (no word boundaries) and survive spelling variants
+NGRAM_SIZES = (2, 3)
+# N-grams are hashed into 2**HASH_BITS buckets, so no vocabulary has to be kept
+HASH_BITS = int(os.getenv("PRERANK_HASH_BITS", "20"))
+# Documents scored per vectorized step; bounds the temporary arrays
+CHUNK_DOCS = 256
+
+_PRIME = np.uint64(1000003)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def ngram_counts(text, sizes=NGRAM_SIZES, hash_bits=HASH_BITS):
+    """Hashed character n-gram counts of a text, as (bucket indices, counts) arrays."""
+    text = _WHITESPACE.sub(" ", text.lower()).strip()
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    hashes = []
+    rolling = codes
+    # Polynomial rolling hash: n-grams of length n from those of length n-1
+    for n in range(2, max(sizes) + 1):
+        if len(codes) < n:
+            break
+        rolling = rolling[:-1] * _PRIME + codes[n - 1:]
+        if n in sizes:
+            hashes.append((rolling * _MIX) >> np.uint64(64 - hash_bits))
+    if not hashes:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    indices, counts = np.unique(np.concatenate(hashes), return_counts=True)
+    return indices.astype(np.int64), counts.astype(np.float32)
+
+
+def similarity_scores(docs, queries, hash_bits=HASH_BITS):
+    """TF-IDF cosine similarity of every document to every query.
+
+    ``docs`` and ``queries`` are lists of ngram_counts() results. Term
+    frequencies are log-scaled and IDF is computed over documents and queries
+    together. Returns a (len(docs), len(queries)) float array; empty documents
+    score 0.
+    """
+    dim = 1 << hash_bits
+    df = np.zeros(dim, dtype=np.float32)
+    for indices, _ in docs + queries:
+        df[indices] += 1  # Indices are unique within a document
+    idf = np.log((1 + len(docs) + len(queries)) / (1 + df)) + 1
+
+    query_matrix = np.zeros((len(queries), dim), dtype=np.float32)
+    for row, (indices, counts) in enumerate(queries):
+        query_matrix[row, indices] = (1 + np.log(counts)) * idf[indices]
+    norms = np.linalg.norm(query_matrix, axis=1, keepdims=True)
+    query_matrix /= np.where(norms > 0, norms, 1)
+
+    scores = np.zeros((len(docs), len(queries)), dtype=np.float32)
+    for start in range(0, len(docs), CHUNK_DOCS):
+        chunk = [(row, docs[row]) for row in range(start, min(start + CHUNK_DOCS, len(docs))) if len(docs[row][0])]
+        if not chunk:
+            continue
+        # All n-grams of the chunk in one flat array; reduceat sums them per document
+        flat_indices = np.concatenate([indices for _, (indices, _) in chunk])
+        flat_weights = np.concatenate([(1 + np.log(counts)) * idf[indices] for _, (indices, counts) in chunk])
+        offsets = np.cumsum([0] + [len(indices) for _, (indices, _) in chunk[:-1]])
+        doc_norms = np.sqrt(np.add.reduceat(flat_weights ** 2, offsets))
+        dots = np.add.reduceat(query_matrix[:, flat_indices] * flat_weights, offsets, axis=1)
+        scores[[row for row, _ in chunk]] = (dots / doc_norms).T
+    return scores
+
+
+def rank_texts(texts, requirements_list):
+    """Similarity of each job text to the closest of the given requirements (0-1)."""
+    docs = [ngram_counts(text) for text in texts]
+    return rank_counts(docs, requirements_list)
+
+
+def rank_counts(docs, requirements_list):
+    """Like rank_texts, for documents already reduced to ngram_counts()."""
+    if not docs:
+        return np.zeros(0, dtype=np.float32)
+    queries = [ngram_counts(requirements) for requirements in requirements_list]
+    return similarity_scores(docs, queries).max(axis=1)
+
+
+def top_k_order(scores, top_k=0):
+    """Indices of scores from best to worst (ties keep input order), trimmed to top_k when > 0."""
+    order = np.argsort(-np.asarray(scores), kind='stable')
+    return order[:top_k].tolist() if top_k and top_k > 0 else order.tolist()
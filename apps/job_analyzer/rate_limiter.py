@@ -0,0 +1,173 @@
+import os
+import time
+import random
+import threading
+
+from metrics import metrics
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the API while the circuit breaker is open."""
+
+
+def is_retryable_error(exc):
+    """True for throttling (429) and transient server errors (5xx)."""
+    # google.api_core exceptions carry the HTTP status as an int ``code``
+    code = getattr(exc, 'code', None)
+    if isinstance(code, int) and (code == 429 or 500 <= code < 600):
+        return True
+    message = str(exc).lower()
+    return any(marker in message for marker in ("429", "resource exhausted", "quota", "rate limit", "503", "500", "unavailable", "deadline exceeded"))
+
+
+def is_throttle_error(exc):
+    code = getattr(exc, 'code', None)
+    return code == 429 or any(marker in str(exc).lower() for marker in ("429", "resource exhausted", "quota", "rate limit"))
+
+
+class AdaptiveLimiter:
+    """Client-side limiter shared by every LLM caller.
+
+    - Token bucket caps the request rate (``rate_per_minute`` with ``burst``).
+    - Concurrency adapts AIMD-style: +1/limit per success, halved on 429/5xx.
+    - Retryable errors are retried with full-jitter exponential backoff.
+    - After ``failure_threshold`` consecutive failed calls the circuit opens for
+      ``reset_timeout`` seconds, then a single trial call decides whether to close it.
+    """
+
+    def __init__(self, rate_per_minute=60, burst=5, max_concurrency=5, min_concurrency=1,
+                 max_retries=5, base_delay=1.0, max_delay=60.0, failure_threshold=5, reset_timeout=30.0):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._cond = threading.Condition()
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self.concurrency_limit = float(self.max_concurrency)
+        self.inflight = 0
+        self._last_decrease = 0.0
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    # --- Circuit breaker ---
+
+    def _check_circuit(self):
+        """Raises CircuitOpenError while open; lets one trial call through once reset_timeout passed."""
+        with self._cond:
+            if self._opened_at is None:
+                return False
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise CircuitOpenError("LLM circuit breaker is open; too many consecutive failures")
+            self._trial_in_flight = True
+            return True
+
+    def _record_outcome(self, success, is_trial):
+        with self._cond:
+            if is_trial:
+                self._trial_in_flight = False
+            if success:
+                self._consecutive_failures = 0
+                self._opened_at = None
+                return
+            self._consecutive_failures += 1
+            if is_trial or self._consecutive_failures >= self.failure_threshold:
+                if self._opened_at is None or is_trial:
+                    metrics.inc("job_analyzer_llm_circuit_open_total")
+                self._opened_at = time.monotonic()
+
+    # --- Rate and concurrency ---
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate_per_second)
+        self._last_refill = now
+
+    def _acquire(self):
+        with self._cond:
+            while True:
+                self._refill()
+                if self.inflight < int(self.concurrency_limit) and self._tokens >= 1:
+                    self._tokens -= 1
+                    self.inflight += 1
+                    return time.monotonic()
+                if self._tokens < 1:
+                    wait = (1 - self._tokens) / self.rate_per_second
+                else:
+                    wait = None  # Woken up by _release
+                self._cond.wait(timeout=wait)
+
+    def _release(self, started_at, throttled):
+        with self._cond:
+            self.inflight -= 1
+            if throttled:
+                # Calls started before the last decrease belong to the same throttling
+                # episode, so the limit is only halved once per episode
+                if started_at > self._last_decrease:
+                    self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+                    self._last_decrease = time.monotonic()
+            else:
+                self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1.0 / self.concurrency_limit)
+            metrics.set_gauge("job_analyzer_llm_concurrency_limit", round(self.concurrency_limit, 2))
+            self._cond.notify_all()
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, fn, *args, **kwargs):
+        """Runs ``fn`` under the rate/concurrency limits with retries and the circuit breaker."""
+        is_trial = self._check_circuit()
+        attempt = 0
+        while True:
+            started_at = self._acquire()
+            throttled = False
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                throttled = is_retryable_error(e)
+                if throttled:
+                    metrics.inc("job_analyzer_llm_throttled_total", kind="429" if is_throttle_error(e) else "5xx")
+                if not throttled or attempt >= self.max_retries:
+                    self._record_outcome(False, is_trial)
+                    raise
+            else:
+                self._record_outcome(True, is_trial)
+                return result
+            finally:
+                self._release(started_at, throttled)
+
+            metrics.inc("job_analyzer_llm_retries_total")
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                "concurrency_limit": round(self.concurrency_limit, 2),
+                "inflight": self.inflight,
+                "circuit_open": self._opened_at is not None
+            }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_llm_limiter():
+    """Returns the process-wide LLM limiter, creating it on first use."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = AdaptiveLimiter(
+                rate_per_minute=float(os.getenv("LLM_RPM", "60")),
+                burst=int(os.getenv("LLM_BURST", "5")),
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "5")),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", "5"))
+            )
+        return _limiter
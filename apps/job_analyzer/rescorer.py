@@ -0,0 +1,126 @@
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from analyzer_service import get_analyzer_service, DEFAULT_PROFILE
+from fetch_cache import get_fetch_cache
+from job_logic import analyze_jobs_batch, BATCH_MAX_JOBS
+from metrics import metrics
+
+
+class Rescorer:
+    """Re-scores stored results in the background after requirements change.
+
+    Results whose ``requirements_version`` differs from the current version of
+    the profile they were scored against are stale. Each profile's stale
+    results are re-analyzed best rank first, then newest first, from the
+    job text saved with each result (or the page cache for older results), so
+    nothing is re-fetched. Every call goes through analyze_jobs_batch and thus
+    the shared LLM limiter. Saving the requirements again mid-run restarts the
+    pass against the new versions.
+    """
+
+    def __init__(self, history_index, result_store, save_result, workers=2, chunk_size=BATCH_MAX_JOBS):
+        self.history_index = history_index
+        self.result_store = result_store
+        self.save_result = save_result
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._restart = False
+        self._progress = {"running": False, "version": None, "profiles": {}, "total": 0, "done": 0, "skipped": 0, "failed": 0,
+                          "started_at": None, "finished_at": None}
+
+    def start(self):
+        """Starts a pass, or makes the running pass start over with the current requirements."""
+        with self._lock:
+            if self._progress["running"]:
+                self._restart = True
+                return
+            self._progress["running"] = True
+            self._restart = False
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def progress(self):
+        with self._lock:
+            return dict(self._progress)
+
+    def _update(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self._progress[key] += value
+            metrics.set_gauge("job_analyzer_rescore_pending", self._progress["total"] - self._progress["done"]
+                              - self._progress["skipped"] - self._progress["failed"])
+
+    def _job_text(self, record):
+        if record.get("job_text"):
+            return record["job_text"]
+        # Results written before job text was stored: use the page cache, never the network
+        return get_fetch_cache().get(record.get("url", ""))
+
+    def _rescore_chunk(self, ids, requirements, version):
+        jobs = []
+        for log_id in ids:
+            record = self.result_store.get(log_id)
+            job_text = self._job_text(record) if record else None
+            if job_text:
+                jobs.append((record, job_text))
+            else:
+                # Nothing to re-score from (and the stored url may be truncated); don't pick it again
+                self.history_index.mark_unrecoverable(log_id)
+                self._update(skipped=1)
+        if not jobs:
+            return
+
+        try:
+            analyses = analyze_jobs_batch([text for _, text in jobs], requirements)
+        except Exception as e:
+            print(f"Re-scoring failed: {e}")
+            analyses = [{"error": str(e)}] * len(jobs)
+
+        for (record, job_text), analysis in zip(jobs, analyses):
+            if "error" in analysis:
+                self._update(failed=1)
+                continue
+            record = dict(record, rank=analysis["rank"], score=analysis["score"], analysis=analysis,
+                          requirements_version=version, rescored_at=datetime.now().isoformat())
+            record.pop("job_text", None)
+            self.save_result(record, job_text)
+            self._update(done=1)
+
+    def _run(self):
+        while True:
+            service = get_analyzer_service()
+            versions = {}
+            chunks = []
+            for profile in service.list_profiles():
+                requirements = service.get_requirements(profile)
+                version = service.get_requirements_version(profile)
+                versions[profile] = version
+                ids = self.history_index.stale_ids(version, profile)
+                if ids:
+                    print(f"Re-scoring {len(ids)} result(s) against profile {profile} ({version}).")
+                chunks.extend((ids[i:i + self.chunk_size], requirements, version)
+                              for i in range(0, len(ids), self.chunk_size))
+            with self._lock:
+                self._restart = False
+                self._progress.update(running=True, version=versions.get(DEFAULT_PROFILE), profiles=versions,
+                                      total=sum(len(ids) for ids, _, _ in chunks), done=0, skipped=0, failed=0,
+                                      started_at=datetime.now().isoformat(), finished_at=None)
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                pending = set()
+                for chunk, requirements, version in chunks:
+                    if self._restart:
+                        break
+                    pending.add(executor.submit(self._rescore_chunk, chunk, requirements, version))
+                    if len(pending) >= self.workers:
+                        _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                wait(pending)
+
+            with self._lock:
+                if not self._restart:
+                    self._progress.update(running=False, finished_at=datetime.now().isoformat())
+                    return
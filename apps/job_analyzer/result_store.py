@@ -0,0 +1,212 @@
+import os
+import gzip
+import json
+import sqlite3
+import threading
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl.gz"
+# Migrated <id>.json logs are moved here instead of being deleted
+LEGACY_DIR = "legacy"
+
+
+class ResultStore:
+    """Append-only store of analysis results.
+
+    Each result is one gzip member holding a JSON line, appended to the active
+    segment file (``segment-000001.jsonl.gz`` ...), so a segment is also a
+    valid ``.jsonl.gz`` that ``zcat`` can read. A SQLite index maps result ids
+    to (segment, offset, length); a read is one seek plus one small
+    decompression. DELETE (and replacing a record) only drops the index row;
+    the garbage bytes of each segment are tracked, and once a segment's
+    garbage ratio reaches ``compact_ratio`` (see ``needs_compaction``),
+    ``compact`` copies its live records into the active segment and removes
+    the file. The active segment is sealed first when it is the one to
+    compact.
+    """
+
+    def __init__(self, root_dir, max_segment_bytes=16 * 1024 * 1024, compact_ratio=0.5):
+        self.root_dir = root_dir
+        self.max_segment_bytes = max_segment_bytes
+        self.compact_ratio = compact_ratio
+        os.makedirs(root_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root_dir, 'index.db'), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS records (id TEXT PRIMARY KEY, segment INTEGER, offset INTEGER, length INTEGER)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_records_segment ON records(segment)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        segments = self._segments()
+        self._active = segments[-1] if segments else 1
+        self._active_file = None
+        # Bytes per segment no longer referenced by the index
+        live = dict(self._conn.execute("SELECT segment, SUM(length) FROM records GROUP BY segment").fetchall())
+        self._garbage = {segment: os.path.getsize(self._segment_path(segment)) - live.get(segment, 0)
+                         for segment in segments}
+
+    def _segment_path(self, segment):
+        return os.path.join(self.root_dir, f"{SEGMENT_PREFIX}{segment:06d}{SEGMENT_SUFFIX}")
+
+    def _segments(self):
+        numbers = []
+        for name in os.listdir(self.root_dir):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+        return sorted(numbers)
+
+    def _append_locked(self, blob):
+        """Appends one compressed record; returns (segment, offset, length). Caller holds the lock."""
+        if self._active_file is None:
+            self._active_file = open(self._segment_path(self._active), 'ab')
+        offset = self._active_file.tell()
+        if offset > 0 and offset + len(blob) > self.max_segment_bytes:
+            self._active_file.close()
+            self._active += 1
+            self._active_file = open(self._segment_path(self._active), 'ab')
+            offset = 0
+        self._active_file.write(blob)
+        self._active_file.flush()
+        return self._active, offset, len(blob)
+
+    def append(self, record):
+        """Stores a result dict (must have an "id"); a later append with the same id replaces it."""
+        line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+        blob = gzip.compress(line, compresslevel=6, mtime=0)
+        with self._lock:
+            self._forget_locked(record["id"])
+            location = self._append_locked(blob)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO records (id, segment, offset, length) VALUES (?, ?, ?, ?)",
+                    (record["id"],) + location
+                )
+
+    def get(self, record_id):
+        """Returns the stored result dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT segment, offset, length FROM records WHERE id = ?", (record_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            segment, offset, length = row
+            with open(self._segment_path(segment), 'rb') as f:
+                f.seek(offset)
+                blob = f.read(length)
+        return json.loads(gzip.decompress(blob))
+
+    def iter_records(self):
+        """Yields every stored result in write order."""
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute("SELECT id FROM records ORDER BY segment, offset")]
+        for record_id in ids:
+            record = self.get(record_id)
+            if record is not None:
+                yield record
+
+    def __contains__(self, record_id):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM records WHERE id = ?", (record_id,)).fetchone() is not None
+
+    def _forget_locked(self, record_id):
+        """Counts a record's current bytes as garbage; returns False if it is not stored. Caller holds the lock."""
+        row = self._conn.execute("SELECT segment, length FROM records WHERE id = ?", (record_id,)).fetchone()
+        if row is None:
+            return False
+        segment, length = row
+        self._garbage[segment] = self._garbage.get(segment, 0) + length
+        return True
+
+    def delete(self, record_id):
+        """Forgets a result; returns False if it did not exist. Space is reclaimed by compact()."""
+        with self._lock, self._conn:
+            if not self._forget_locked(record_id):
+                return False
+            self._conn.execute("DELETE FROM records WHERE id = ?", (record_id,))
+            return True
+
+    def _due_locked(self):
+        """Segments whose garbage ratio reached compact_ratio. Caller holds the lock."""
+        if self._active_file is not None:
+            self._active_file.flush()
+        due = []
+        for segment, garbage in self._garbage.items():
+            path = self._segment_path(segment)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size and garbage / size >= self.compact_ratio:
+                due.append(segment)
+        return sorted(due)
+
+    def needs_compaction(self):
+        """Whether compact() has anything to reclaim; cheap enough to ask after every delete."""
+        with self._lock:
+            return bool(self._due_locked())
+
+    def compact(self):
+        """Rewrites segments whose garbage ratio reached compact_ratio; returns bytes reclaimed."""
+        reclaimed = 0
+        with self._lock:
+            for segment in self._due_locked():
+                if segment == self._active:
+                    # Seal the active segment so its live records can move to a fresh one
+                    if self._active_file is not None:
+                        self._active_file.close()
+                        self._active_file = None
+                    self._active += 1
+                path = self._segment_path(segment)
+                size = os.path.getsize(path)
+                rows = self._conn.execute(
+                    "SELECT id, offset, length FROM records WHERE segment = ? ORDER BY offset", (segment,)
+                ).fetchall()
+                live = sum(length for _, _, length in rows)
+
+                # Compressed records are copied verbatim into the active segment
+                moved = []
+                with open(path, 'rb') as f:
+                    for record_id, offset, length in rows:
+                        f.seek(offset)
+                        moved.append(self._append_locked(f.read(length)) + (record_id,))
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE records SET segment = ?, offset = ?, length = ? WHERE id = ?", moved
+                    )
+                os.remove(path)
+                self._garbage.pop(segment, None)
+                reclaimed += size - live
+        return reclaimed
+
+    def migrate_from_json(self, logs_dir):
+        """Moves legacy per-result ``<id>.json`` files into the store (once).
+
+        Pre-rendered HTML is dropped, since /log/<id> renders it on demand.
+        The original files are kept in ``<logs_dir>/legacy/`` as a backup.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'json_logs_migrated'").fetchone()
+        if row:
+            return
+
+        count = 0
+        for filename in sorted(os.listdir(logs_dir)):
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(logs_dir, filename)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"Skipping unreadable log {filename}: {e}")
+                continue
+            data.setdefault("id", filename[:-len('.json')])
+            data.pop("html", None)
+            self.append(data)
+            os.makedirs(os.path.join(logs_dir, LEGACY_DIR), exist_ok=True)
+            os.replace(path, os.path.join(logs_dir, LEGACY_DIR, filename))
+            count += 1
+
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_logs_migrated', '1')")
+        print(f"Moved {count} JSON logs into the result store (originals kept in {LEGACY_DIR}/).")
@@ -8,12 +8,16 @@ document.addEventListener('DOMContentLoaded', () => {
   const resultsSection = document.getElementById('results-section');
   const resultsGrid = document.getElementById('results-grid');
   const historyList = document.getElementById('history-list');
+  const rescoreStatus = document.getElementById('rescore-status');
   const modal = document.getElementById('detail-modal');
   const modalBody = document.getElementById('modal-body');
   const closeModal = document.querySelector('.close-modal');
 
   const jobTextInput = document.getElementById('job-text-input');
   const requirementsInput = document.getElementById('requirements-input');
+  const profilePicker = document.getElementById('profile-picker');
+  const profileSelect = document.getElementById('profile-select');
+  const newProfileBtn = document.getElementById('new-profile-btn');
 
   // --- Tab Management ---
   const tabBtns = document.querySelectorAll('.tab-btn');
@@ -37,6 +41,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
   // --- Initial Loading ---
   loadHistory();
+  pollRescore();
+  loadProfiles();
 
   async function loadHistory() {
     historyList.innerHTML = '<div class="loading-spinner-sm"></div>';
@@ -52,7 +58,7 @@ document.addEventListener('DOMContentLoaded', () => {
           item.innerHTML = `
                         <div class="h-meta">
                             <span class="rank-badge rank-${log.rank || 'Unknown'}" style="font-size:0.65em; padding:2px 5px;">${log.rank || '不明'}</span>
-                            <span style="font-size:0.75rem;">${new Date(log.timestamp).toLocaleDateString('ja-JP')}</span>
+                            <span style="font-size:0.75rem;">${new Date(log.timestamp).toLocaleDateString('ja-JP')}${log.profile && log.profile !== 'default' ? `<span class="profile-label">${log.profile}</span>` : ''}${log.stale ? '<span class="h-stale" title="以前の希望条件で診断された結果です">再評価待ち</span>' : ''}</span>
                             <button class="delete-history-btn" data-id="${log.id}"><i class="fa-solid fa-trash-can"></i></button>
                         </div>
                         <div class="h-url" title="${log.url}">${log.url}</div>
@@ -84,6 +90,31 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   }
 
+  // Shows background re-scoring progress after the requirements change
+  async function pollRescore() {
+    try {
+      const res = await fetch('/rescore');
+      const progress = await res.json();
+      if (progress.running) {
+        const processed = progress.done + progress.skipped + progress.failed;
+        const percent = progress.total ? Math.round(processed / progress.total * 100) : 0;
+        rescoreStatus.innerHTML = `
+                    <i class="fa-solid fa-rotate fa-spin"></i> 新しい希望条件で再評価中... ${processed} / ${progress.total}
+                    <div class="rescore-bar"><div style="width:${percent}%"></div></div>
+                `;
+        rescoreStatus.classList.remove('hidden');
+        setTimeout(pollRescore, 3000);
+      } else {
+        if (!rescoreStatus.classList.contains('hidden')) {
+          loadHistory();
+        }
+        rescoreStatus.classList.add('hidden');
+      }
+    } catch (e) {
+      console.error(e);
+    }
+  }
+
   async function deleteHistory(id) {
     try {
       const res = await fetch(`/log/${id}`, { method: 'DELETE' });
@@ -145,13 +176,20 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     try {
-      const res = await fetch('/analyze', {
+      const res = await fetch('/analyze-stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ urls })
+        body: JSON.stringify({ urls, profiles: selectedProfiles() })
+      });
+      if (!res.ok) {
+        const data = await res.json();
+        throw data.error;
+      }
+      resultsSection.classList.remove('hidden');
+      resultsSection.scrollIntoView({ behavior: 'smooth' });
+      await readEventStream(res, result => {
+        resultsGrid.appendChild(createResultCard(result));
       });
-      const data = await res.json();
-      renderResults(data.results);
       loadHistory();
     } catch (error) {
       alert('診断に失敗しました: ' + error);
@@ -176,7 +214,7 @@ document.addEventListener('DOMContentLoaded', () => {
       const res = await fetch('/analyze-text', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ text })
+        body: JSON.stringify({ text, profiles: selectedProfiles() })
       });
       const result = await res.json();
       renderResults([result]);
@@ -188,11 +226,56 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   });
 
+  // --- Profiles ---
+  // "default" is requirements.md; more profiles are scored side by side
+  async function loadProfiles(selected) {
+    try {
+      const res = await fetch('/profiles');
+      const data = await res.json();
+      const names = data.profiles.map(profile => profile.name);
+      const checked = new Set(selectedProfiles() || ['default']);
+
+      profileSelect.innerHTML = names.map(name => `<option value="${name}">${name === 'default' ? 'default (requirements.md)' : name}</option>`).join('');
+      profileSelect.value = selected || 'default';
+
+      profilePicker.innerHTML = '<span>診断に使う希望条件:</span>' + names.map(name => `
+                <label><input type="checkbox" name="profile" value="${name}" ${checked.has(name) ? 'checked' : ''}> ${name}</label>
+            `).join('');
+      profilePicker.classList.toggle('hidden', names.length < 2);
+    } catch (e) {
+      console.error(e);
+    }
+  }
+
+  // Profiles checked in the picker, or null for the default requirements only
+  function selectedProfiles() {
+    const names = Array.from(profilePicker.querySelectorAll('input[name="profile"]:checked')).map(input => input.value);
+    if (names.length === 0 || (names.length === 1 && names[0] === 'default')) return null;
+    return names;
+  }
+
+  profileSelect.addEventListener('change', () => loadRequirements());
+
+  newProfileBtn.addEventListener('click', async () => {
+    const name = (prompt('新しいプロファイル名（英数字・_・-）') || '').trim();
+    if (!name) return;
+    if (!/^[\w-]{1,40}$/.test(name)) {
+      alert('プロファイル名には英数字・_・- のみ使用できます');
+      return;
+    }
+    await loadProfiles(name);
+    if (profileSelect.value !== name) {
+      profileSelect.insertAdjacentHTML('beforeend', `<option value="${name}">${name}</option>`);
+      profileSelect.value = name;
+    }
+    requirementsInput.value = '';
+  });
+
   // --- Requirements Logic ---
   async function loadRequirements() {
     requirementsInput.value = '読み込み中...';
     try {
-      const res = await fetch('/requirements');
+      const res = await fetch(`/profiles/${encodeURIComponent(profileSelect.value || 'default')}`);
       const data = await res.json();
       requirementsInput.value = data.content;
     } catch (e) {
@@ -202,20 +285,24 @@ document.addEventListener('DOMContentLoaded', () => {
 
   saveRequirementsBtn.addEventListener('click', async () => {
     const content = requirementsInput.value;
+    const profile = profileSelect.value || 'default';
     saveRequirementsBtn.disabled = true;
     saveRequirementsBtn.innerHTML = '<i class="fa-solid fa-spinner fa-spin"></i> 保存中...';
 
     try {
-      const res = await fetch('/requirements', {
+      const res = await fetch(`/profiles/${encodeURIComponent(profile)}`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ content })
       });
       const data = await res.json();
       if (data.status === 'success') {
-        alert('希望条件を保存しました。');
+        alert('希望条件を保存しました。過去の診断結果は新しい条件でバックグラウンドで再評価されます。');
+        loadProfiles(profile);
+        loadHistory();
+        pollRescore();
       } else {
-        alert('保存に失敗しました: ' + data.message);
+        alert('保存に失敗しました: ' + (data.message || data.error));
       }
     } catch (e) {
       alert('エラー: 保存に失敗しました。');
@@ -241,34 +328,77 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   }
 
+  // Reads a text/event-stream response and calls onResult for every data event
+  async function readEventStream(res, onResult) {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let eventName = 'message';
+        let payload = '';
+        rawEvent.split('\n').forEach(line => {
+          if (line.startsWith('event:')) eventName = line.slice(6).trim();
+          if (line.startsWith('data:')) payload += line.slice(5).trim();
+        });
+
+        if (eventName === 'done') return;
+        if (payload) onResult(JSON.parse(payload));
+      }
+    }
+  }
+
+  function createResultCard(result) {
+    // One job scored against several profiles: one card per profile
+    if (result.profiles) {
+      const cards = document.createDocumentFragment();
+      result.profiles.forEach(entry => {
+        cards.appendChild(createResultCard(Object.assign({ url: result.url }, entry)));
+      });
+      return cards;
+    }
+
+    const card = document.createElement('div');
+    card.className = 'result-card animated';
+
+    if (result.status === 'error') {
+      card.innerHTML = `
+                <span class="rank-badge rank-Error">エラー</span>
+                <div class="card-content">
+                    <h4>${result.profile ? `[${result.profile}] ` : ''}${result.message}</h4>
+                    <div class="h-url" style="color:#94a3b8">${result.url}</div>
+                </div>
+            `;
+    } else {
+      card.innerHTML = `
+                <div class="card-header">
+                  <span class="rank-badge rank-${result.rank}">${result.rank} 判定</span>
+                  ${result.score ? `<span class="score-pill">${result.score}% 適合</span>` : ''}
+                  ${result.profile && result.profile !== 'default' ? `<span class="profile-label">${result.profile}</span>` : ''}
+                </div>
+                <div class="card-content">
+                    <h4 title="${result.url}">${result.url}</h4>
+                    <p class="card-date">${result.duplicate_of ? `重複求人: ${result.duplicate_url} の診断結果` : '先ほど診断'}</p>
+                </div>
+            `;
+      card.onclick = () => showLogDetails(result.id);
+    }
+    return card;
+  }
+
   function renderResults(results) {
     resultsSection.classList.remove('hidden');
     results.forEach(result => {
-      const card = document.createElement('div');
-      card.className = 'result-card animated';
-
-      if (result.status === 'error') {
-        card.innerHTML = `
-                  <span class="rank-badge rank-Error">エラー</span>
-                  <div class="card-content">
-                      <h4>${result.message}</h4>
-                      <div class="h-url" style="color:#94a3b8">${result.url}</div>
-                  </div>
-              `;
-      } else {
-        card.innerHTML = `
-                  <div class="card-header">
-                    <span class="rank-badge rank-${result.rank}">${result.rank} 判定</span>
-                    ${result.score ? `<span class="score-pill">${result.score}% 適合</span>` : ''}
-                  </div>
-                  <div class="card-content">
-                      <h4 title="${result.url}">${result.url}</h4>
-                      <p class="card-date">先ほど診断</p>
-                  </div>
-              `;
-        card.onclick = () => showLogDetails(result.id);
-      }
-      resultsGrid.appendChild(card);
+      resultsGrid.appendChild(createResultCard(result));
     });
 
     resultsSection.scrollIntoView({ behavior: 'smooth' });